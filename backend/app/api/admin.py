@@ -0,0 +1,61 @@
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from ..schemas.schemas import ArchiveStatus, BackupStatus, MaintenanceStats
+from ..db.backups import BackupStore, get_backups
+from ..db.maintenance import Maintenance, get_maintenance
+from ..db.database import get_db, DBManager
+
+router = APIRouter()
+
+@router.get("/archive", response_model=ArchiveStatus)
+def get_archive_status(db: DBManager = Depends(get_db)):
+    return db.archive.get_status()
+
+@router.post("/archive", response_model=ArchiveStatus)
+def archive_before(before: str, db: DBManager = Depends(get_db)):
+    """Move everything dated before ``before`` (YYYY-MM-DD) into the per-year archive files."""
+    try:
+        db.archive.archive_before(before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return db.archive.get_status()
+
+def _backup_status(store: BackupStore):
+    return {
+        "directory": store.directory,
+        "interval_hours": store.interval_hours,
+        "keep": store.keep,
+        "last": store.read_status() or None,
+        "backups": store.list_backups(),
+    }
+
+@router.get("/backups", response_model=BackupStatus)
+def get_backup_status(store: BackupStore = Depends(get_backups)):
+    """Backup files and the running backup's progress (or the last backup's duration and size)."""
+    return _backup_status(store)
+
+@router.post("/backups", response_model=BackupStatus, status_code=202)
+def start_backup(background_tasks: BackgroundTasks, store: BackupStore = Depends(get_backups)):
+    """Start an online backup; poll GET /backups for its progress."""
+    if store.directory is None:
+        raise HTTPException(status_code=400, detail="Backups need a database file or HEALTH_BACKUP_DIR")
+    if store.is_running():
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    background_tasks.add_task(store.run)
+    return _backup_status(store)
+
+@router.get("/maintenance", response_model=MaintenanceStats)
+def get_maintenance_stats(maintenance: Maintenance = Depends(get_maintenance)):
+    """Page counts, free pages and per-table fragmentation, with the last maintenance run."""
+    return maintenance.get_stats()
+
+@router.post("/maintenance", response_model=MaintenanceStats)
+def run_maintenance(rebuild: bool = False, maintenance: Maintenance = Depends(get_maintenance)):
+    """Run ANALYZE, PRAGMA optimize, incremental vacuum and a WAL checkpoint now.
+
+    ``rebuild`` permits the one-time VACUUM an older database needs for incremental vacuuming.
+    """
+    try:
+        maintenance.run(rebuild=rebuild)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return maintenance.get_stats()
@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+import orjson
+from ..schemas.schemas import ActivityAttribution, ExerciseCorrelation, RollingStats, Heatmap, Completeness
+from ..services.analytics_service import AnalyticsService
+from ..db.database import get_db, DBManager
+from ..db.crud import AnalyticsCRUD, ExerciseCRUD
+from .responses import RawJSONResponse
+
+router = APIRouter()
+
+def get_analytics_service(db: DBManager = Depends(get_db)):
+    return AnalyticsService(AnalyticsCRUD(db), ExerciseCRUD(db))
+
+@router.get("/activities", response_model=ActivityAttribution)
+def get_activity_attribution(
+    symptom: str = "pain",
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_days: int = Query(1, ge=1),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    try:
+        return service.activity_attribution(symptom, start_date, end_date, min_days)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/exercise_correlation", response_model=ExerciseCorrelation)
+def get_exercise_correlation(
+    start_date: str,
+    end_date: str,
+    symptom: str = "pain_level",
+    lags: str = "0,1",
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    try:
+        return service.exercise_correlation(symptom, start_date, end_date, lags)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/rolling", response_model=RollingStats)
+def get_rolling_stats(
+    symptom: str = "pain_level",
+    window: int = Query(7, ge=2, le=365),
+    flare_z: float = Query(2.0, gt=0),
+    cusum_threshold: float = Query(4.0, gt=0),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    try:
+        return service.rolling_stats(symptom, window, flare_z, cusum_threshold, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/heatmap", response_model=Heatmap)
+def get_heatmap(
+    start_date: str,
+    end_date: str,
+    symptom: str = "pain_level",
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    try:
+        heatmap = service.heatmap(symptom, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return RawJSONResponse(orjson.dumps(heatmap))
+
+@router.get("/completeness", response_model=Completeness)
+def get_completeness(
+    start_date: str,
+    end_date: str,
+    period: str = "week",
+    limit: int = Query(500, ge=1, le=5000),
+    offset: int = Query(0, ge=0),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    try:
+        return service.completeness(start_date, end_date, period, limit, offset)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from typing import List
+import orjson
+from ..schemas.schemas import DayBundle
+from ..db.database import get_db, DBManager
+from ..db.crud import DayCRUD
+from .responses import RawJSONResponse
+
+router = APIRouter()
+
+def get_crud(db: DBManager = Depends(get_db)):
+    return DayCRUD(db)
+
+@router.get("/", response_model=List[DayBundle])
+def get_days(start_date: str, end_date: str, crud: DayCRUD = Depends(get_crud)):
+    return RawJSONResponse(orjson.dumps(crud.get_days_in_range(start_date, end_date)))
+
+@router.get("/{date}", response_model=DayBundle)
+def get_day(date: str, crud: DayCRUD = Depends(get_crud)):
+    return RawJSONResponse(orjson.dumps(crud.get_day(date)))
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import PlainTextResponse
 from typing import List, Dict, Any, Optional
-from ..schemas.schemas import ExerciseConfigItem, ExerciseLog, ExerciseLogCreate
+from ..schemas.schemas import ExerciseConfigItem, ExerciseLog, ExerciseLogCreate, ExerciseStats
 from ..services.exercise_service import ExerciseService
 from ..db.database import get_db, DBManager
 from ..db.crud import ExerciseCRUD
+from .responses import RawJSONResponse, encode_rows, trusted_response
 
 router = APIRouter()
 
@@ -21,7 +22,14 @@ def update_config(config: List[Dict[str, Any]], service: ExerciseService = Depen
 
 @router.get("/logs", response_model=List[ExerciseLog])
 def get_all_logs(service: ExerciseService = Depends(get_exercise_service)):
-    return service.get_all_logs()
+    return RawJSONResponse(encode_rows(service.get_all_logs(raw_json=True), ("data",)))
+
+@router.get("/stats", response_model=List[ExerciseStats])
+def get_stats(as_of: Optional[str] = None, service: ExerciseService = Depends(get_exercise_service)):
+    try:
+        return service.get_stats(as_of)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
 
 @router.get("/export", response_class=PlainTextResponse)
 def export_logs(start_date: str, end_date: str, service: ExerciseService = Depends(get_exercise_service)):
@@ -36,7 +44,7 @@ def get_log(date: str, service: ExerciseService = Depends(get_exercise_service))
     if not log:
         # Return None (null) instead of 404 to avoid errors in logs
         return None
-    return {"date": date, "data": log}
+    return trusted_response(ExerciseLog, {"date": date, "data": log})
 
 @router.post("/logs/{date}", response_model=ExerciseLog)
 def save_log(date: str, log_data: Dict[str, Any], service: ExerciseService = Depends(get_exercise_service)):
@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import Optional
+
+import orjson
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from ..db.database import get_db, DBManager, JSON_COLUMNS
+from ..db.crud import RecordCRUD, ExerciseCRUD, AnalyticsCRUD, RECORD_COLUMNS, SUMMARY_COLUMNS
+from ..services.bundle_export import iter_zip
+from ..services.exercise_service import ExerciseService
+from ..services.record_excel_export import build_health_records_workbook
+from ..services.record_stream_export import iter_csv
+from .responses import iter_ndjson
+
+router = APIRouter()
+
+@router.get("/bundle")
+def export_bundle(start_date: Optional[str] = None, end_date: Optional[str] = None, db: DBManager = Depends(get_db)):
+    """Stream a ZIP of every table (NDJSON and CSV), the Excel workbook, the exercise Markdown and config.
+
+    Without a date range the bundle covers all data. Members are generated one at a time
+    while the archive is being sent, so the download starts immediately.
+    """
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
+
+    record_crud = RecordCRUD(db)
+    exercise_crud = ExerciseCRUD(db)
+    exercise_service = ExerciseService(exercise_crud)
+    analytics_crud = AnalyticsCRUD(db)
+
+    first, last = analytics_crud.get_date_span()
+    start, end = start_date or first, end_date or last
+    if start and end and end < start:
+        start, end = end, start
+
+    def manifest():
+        yield orjson.dumps({
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "data_version": db.get_data_version(),
+            "start_date": start,
+            "end_date": end,
+        }, option=orjson.OPT_INDENT_2)
+
+    def exercise_config():
+        yield orjson.dumps(exercise_service.get_config(), option=orjson.OPT_INDENT_2)
+
+    def exercise_markdown():
+        yield exercise_service.export_logs(start, end).encode("utf-8")
+
+    def workbook():
+        records = record_crud.get_records_in_range(start, end)
+        summaries_by_date = record_crud.get_summaries_in_range(start, end)
+        dates = analytics_crud.get_calendar(start, end)
+        yield build_health_records_workbook(start, end, records, summaries_by_date, dates)
+
+    members = [
+        ("manifest.json", manifest),
+        ("exercise_config.json", exercise_config),
+        ("daily_records.ndjson", lambda: iter_ndjson(
+            record_crud.iter_records(start, end), JSON_COLUMNS["daily_records"]
+        )),
+        ("daily_records.csv", lambda: iter_csv(record_crud.iter_records(start, end), RECORD_COLUMNS)),
+        ("daily_summaries.ndjson", lambda: iter_ndjson(
+            record_crud.iter_summaries(start, end), JSON_COLUMNS["daily_summaries"]
+        )),
+        ("daily_summaries.csv", lambda: iter_csv(record_crud.iter_summaries(start, end), SUMMARY_COLUMNS)),
+        ("exercise_logs.ndjson", lambda: iter_ndjson(exercise_crud.iter_exercise_logs(start, end), ("data",))),
+    ]
+    if start and end:
+        members += [
+            ("exercise_logs.md", exercise_markdown),
+            ("health_records.xlsx", workbook),
+        ]
+
+    filename = f"health_recorder_{datetime.now().strftime('%Y%m%d')}.zip"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(iter_zip(members), media_type="application/zip", headers=headers)
@@ -1,22 +1,72 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import StreamingResponse
-from datetime import datetime, timedelta
+from datetime import datetime
 from io import BytesIO
 from typing import List, Optional
 from ..schemas.schemas import DailyRecord, DailyRecordCreate
 from ..services.record_service import RecordService
-from ..db.database import get_db, DBManager
-from ..db.crud import RecordCRUD
+from ..db.database import get_db, DBManager, JSON_COLUMNS
+from ..db.crud import RecordCRUD, AnalyticsCRUD, RECORD_COLUMNS, RECORD_KEY_FIELDS, parse_fields
 from ..services.record_excel_export import build_health_records_workbook
+from ..services.record_stream_export import EXPORT_MEDIA_TYPES, iter_csv
+from .responses import RawJSONResponse, encode_row, encode_rows, iter_ndjson, trusted_response
 
 router = APIRouter()
 
 def get_record_service(db: DBManager = Depends(get_db)):
     return RecordService(RecordCRUD(db))
 
+def get_record_fields(fields: Optional[str] = None):
+    """Comma-separated columns to return; id, date and time_of_day are always included."""
+    try:
+        return parse_fields(fields, RECORD_COLUMNS, required=RECORD_KEY_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/", response_model=List[DailyRecord])
-def get_all_records(service: RecordService = Depends(get_record_service)):
-    return service.get_all_records()
+def get_all_records(
+    fields: tuple = Depends(get_record_fields),
+    service: RecordService = Depends(get_record_service)
+):
+    records = service.get_all_records(raw_json=True, fields=fields)
+    return RawJSONResponse(encode_rows(records, JSON_COLUMNS["daily_records"]))
+
+@router.get("/range", response_model=List[DailyRecord])
+def get_records_in_range(
+    start_date: str,
+    end_date: str,
+    fields: tuple = Depends(get_record_fields),
+    service: RecordService = Depends(get_record_service)
+):
+    records = service.get_records_in_range(start_date, end_date, raw_json=True, fields=fields)
+    return RawJSONResponse(encode_rows(records, JSON_COLUMNS["daily_records"]))
+
+@router.get("/export")
+def export_records(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    fields: tuple = Depends(get_record_fields),
+    db: DBManager = Depends(get_db)
+):
+    """Stream records as CSV or NDJSON; memory use does not grow with the number of rows."""
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid date format, expected YYYY-MM-DD")
+
+    records = RecordCRUD(db).iter_records(start_date, end_date, fields)
+    if format == "csv":
+        content = iter_csv(records, fields)
+    else:
+        content = iter_ndjson(records, JSON_COLUMNS["daily_records"])
+
+    span = "_".join(d.replace("-", "") for d in (start_date, end_date) if d)
+    filename = f"health_records{'_' + span if span else ''}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    return StreamingResponse(content, media_type=EXPORT_MEDIA_TYPES[format], headers=headers)
 
 @router.get("/export_excel")
 def export_excel(start_date: str, end_date: str, db: DBManager = Depends(get_db)):
@@ -29,21 +79,17 @@ def export_excel(start_date: str, end_date: str, db: DBManager = Depends(get_db)
     if end < start:
         start, end = end, start
 
-    dates = []
-    cur = start
-    while cur <= end:
-        dates.append(cur.strftime("%Y-%m-%d"))
-        cur += timedelta(days=1)
-
     crud = RecordCRUD(db)
     records = crud.get_records_in_range(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
-    summaries_by_date = crud.get_summaries_for_dates(dates)
+    summaries_by_date = crud.get_summaries_in_range(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
+    dates = AnalyticsCRUD(db).get_calendar(start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d"))
 
     content = build_health_records_workbook(
         start.strftime("%Y-%m-%d"),
         end.strftime("%Y-%m-%d"),
         records,
-        summaries_by_date
+        summaries_by_date,
+        dates
     )
 
     filename = f"health_records_{start.strftime('%Y%m%d')}_{end.strftime('%Y%m%d')}.xlsx"
@@ -55,14 +101,21 @@ def export_excel(start_date: str, end_date: str, db: DBManager = Depends(get_db)
     )
 
 @router.get("/{date}/{time_of_day}", response_model=Optional[DailyRecord])
-def get_record(date: str, time_of_day: str, service: RecordService = Depends(get_record_service)):
-    record = service.get_record(date, time_of_day)
+def get_record(
+    date: str,
+    time_of_day: str,
+    fields: tuple = Depends(get_record_fields),
+    service: RecordService = Depends(get_record_service)
+):
+    record = service.get_record(date, time_of_day, fields, raw_json=True)
     # Return None (null) instead of 404 if not found, to avoid errors in logs for routine checks
-    return record
+    if record is None:
+        return RawJSONResponse(b"null")
+    return RawJSONResponse(encode_row(record, frozenset(JSON_COLUMNS["daily_records"])))
 
 @router.post("/", response_model=DailyRecord)
 def create_record(record: DailyRecordCreate, service: RecordService = Depends(get_record_service)):
-    return service.create_or_update_record(record)
+    return trusted_response(DailyRecord, service.create_or_update_record(record))
 
 @router.delete("/{record_id}")
 def delete_record(record_id: int, service: RecordService = Depends(get_record_service)):
@@ -0,0 +1,69 @@
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Type
+
+import orjson
+from fastapi.responses import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+class RawJSONResponse(Response):
+    """A JSON response whose body has already been encoded."""
+
+    media_type = "application/json"
+
+
+def encode_row(row: dict, raw_fields: Iterable[str]) -> bytes:
+    """Encode one row with orjson, splicing in JSON-text columns verbatim.
+
+    Values of ``raw_fields`` must already be JSON text (see DBManager._raw_json);
+    they are written into the output as-is instead of being decoded and re-encoded.
+    """
+    plain = {}
+    raw = []
+    for key, value in row.items():
+        if key in raw_fields and isinstance(value, str):
+            raw.append(b'"' + key.encode() + b'":' + value.encode())
+        else:
+            plain[key] = value
+    body = orjson.dumps(plain)
+    if not raw:
+        return body
+    separator = b"," if len(body) > 2 else b""
+    return body[:-1] + separator + b",".join(raw) + b"}"
+
+
+def encode_rows(rows: Iterable[dict], raw_fields: Iterable[str]) -> bytes:
+    raw_fields = frozenset(raw_fields)
+    return b"[" + b",".join(encode_row(row, raw_fields) for row in rows) + b"]"
+
+
+def iter_ndjson(rows: Iterable[dict], raw_fields: Iterable[str], batch_size: int = 500) -> Iterator[bytes]:
+    """Encode rows as newline-delimited JSON, yielding one chunk per ``batch_size`` rows."""
+    raw_fields = frozenset(raw_fields)
+    chunk = []
+    for row in rows:
+        chunk.append(encode_row(row, raw_fields))
+        if len(chunk) >= batch_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+@lru_cache(maxsize=None)
+def _adapter(tp) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def trusted_response(model: Type[BaseModel], data) -> RawJSONResponse:
+    """Serialise rows produced by our own CRUD layer without re-validating them.
+
+    ``data`` is a dict, a list of dicts or None. Instances are built with
+    ``model_construct`` and encoded by a cached TypeAdapter, so defaults are
+    still applied and unknown keys dropped, but no field is validated.
+    """
+    if isinstance(data, list):
+        instances = [model.model_construct(**row) for row in data]
+        return RawJSONResponse(_adapter(List[model]).dump_json(instances))
+    instance = model.model_construct(**data) if data is not None else None
+    return RawJSONResponse(_adapter(Optional[model]).dump_json(instance))
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Literal, Optional
+from ..schemas.schemas import JsonEntryDay, JsonEntryResults, SearchResults
+from ..db.database import get_db, DBManager
+from ..db import json_entries, search_index
+
+router = APIRouter()
+
+@router.get("/", response_model=SearchResults)
+def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: DBManager = Depends(get_db)
+):
+    if not db.fts_enabled:
+        raise HTTPException(status_code=503, detail="Full-text search is not available (SQLite without FTS5)")
+    conn = db.get_connection()
+    try:
+        total, items = search_index.search(
+            conn, q, limit, offset, sources_for=lambda start, end: db.archive.sources(conn, start, end)
+        )
+    finally:
+        conn.close()
+    return {"total": total, "items": items}
+
+def get_entry_filters(
+    field: Literal["notes", "triggers", "interventions"],
+    key: Optional[str] = None,
+    contains: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """Entries of one JSON field, optionally for one key (symptom) and/or containing a substring."""
+    return {"field": field, "key": key, "contains": contains, "start_date": start_date, "end_date": end_date}
+
+@router.get("/entries", response_model=JsonEntryResults)
+def search_entries(
+    filters: dict = Depends(get_entry_filters),
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    db: DBManager = Depends(get_db)
+):
+    conn = db.get_connection()
+    try:
+        total, items = json_entries.find_entries(conn, **filters, limit=limit, offset=offset)
+    finally:
+        conn.close()
+    return {"total": total, "items": items}
+
+@router.get("/entries/days", response_model=List[JsonEntryDay])
+def search_entry_days(filters: dict = Depends(get_entry_filters), db: DBManager = Depends(get_db)):
+    conn = db.get_connection()
+    try:
+        return json_entries.find_days(conn, **filters)
+    finally:
+        conn.close()
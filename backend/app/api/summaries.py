@@ -1,20 +1,46 @@
-from fastapi import APIRouter, Depends
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 from ..schemas.schemas import DailySummary, DailySummaryCreate
-from ..db.database import get_db, DBManager
-from ..db.crud import RecordCRUD
+from ..db.database import get_db, DBManager, JSON_COLUMNS
+from ..db.crud import RecordCRUD, SUMMARY_COLUMNS, parse_fields
+from .responses import RawJSONResponse, encode_row, encode_rows, trusted_response
 
 router = APIRouter()
 
 def get_crud(db: DBManager = Depends(get_db)):
     return RecordCRUD(db)
 
+def get_summary_fields(fields: Optional[str] = None):
+    """Comma-separated columns to return; date is always included."""
+    try:
+        return parse_fields(fields, SUMMARY_COLUMNS, required=("date",))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/", response_model=List[DailySummary])
+def list_summaries(
+    start_date: str,
+    end_date: str,
+    fields: tuple = Depends(get_summary_fields),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
+    crud: RecordCRUD = Depends(get_crud)
+):
+    total, summaries = crud.list_summaries(start_date, end_date, fields, limit, offset, raw_json=True)
+    return RawJSONResponse(
+        encode_rows(summaries, JSON_COLUMNS["daily_summaries"]),
+        headers={"X-Total-Count": str(total)}
+    )
+
 @router.get("/{date}", response_model=Optional[DailySummary])
-def get_summary(date: str, crud: RecordCRUD = Depends(get_crud)):
-    return crud.get_summary(date)
+def get_summary(date: str, fields: tuple = Depends(get_summary_fields), crud: RecordCRUD = Depends(get_crud)):
+    summary = crud.get_summary(date, fields, raw_json=True)
+    if summary is None:
+        return RawJSONResponse(b"null")
+    return RawJSONResponse(encode_row(summary, frozenset(JSON_COLUMNS["daily_summaries"])))
 
 @router.post("/", response_model=DailySummary)
 def upsert_summary(summary: DailySummaryCreate, crud: RecordCRUD = Depends(get_crud)):
     crud.upsert_summary(summary.model_dump())
-    return crud.get_summary(summary.date)
+    return trusted_response(DailySummary, crud.get_summary(summary.date))
 
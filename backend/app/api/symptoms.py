@@ -0,0 +1,62 @@
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from ..schemas.schemas import SymptomCatalogueItem, SymptomScore
+from ..db.database import get_db, DBManager
+from ..db.crud import SymptomCRUD
+
+router = APIRouter()
+
+def get_crud(db: DBManager = Depends(get_db)):
+    return SymptomCRUD(db)
+
+def get_existing_symptom(symptom_id: str, crud: SymptomCRUD = Depends(get_crud)):
+    symptom = crud.get_symptom(symptom_id)
+    if symptom is None:
+        raise HTTPException(status_code=404, detail=f"Unknown symptom {symptom_id}")
+    return symptom
+
+@router.get("/", response_model=List[SymptomCatalogueItem])
+def get_catalogue(crud: SymptomCRUD = Depends(get_crud)):
+    return crud.get_catalogue()
+
+@router.post("/", response_model=SymptomCatalogueItem)
+def save_symptom(item: SymptomCatalogueItem, crud: SymptomCRUD = Depends(get_crud)):
+    try:
+        return crud.save_symptom(item.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.delete("/{symptom_id}")
+def delete_symptom(symptom_id: str, crud: SymptomCRUD = Depends(get_crud)):
+    try:
+        deleted = crud.delete_symptom(symptom_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"Unknown symptom {symptom_id}")
+    return {"status": "success"}
+
+@router.get("/{symptom_id}/scores", response_model=List[SymptomScore])
+def get_scores(
+    start_date: str,
+    end_date: str,
+    symptom: dict = Depends(get_existing_symptom),
+    crud: SymptomCRUD = Depends(get_crud)
+):
+    try:
+        rows = crud.get_scores(symptom["id"], start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return [{"date": date, "slot": slot, "level": level} for date, slot, level in rows]
+
+@router.put("/{symptom_id}/scores")
+def save_scores(
+    scores: List[SymptomScore],
+    symptom: dict = Depends(get_existing_symptom),
+    crud: SymptomCRUD = Depends(get_crud)
+):
+    try:
+        crud.save_scores(symptom, [score.model_dump() for score in scores])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"status": "success", "count": len(scores)}
@@ -0,0 +1,282 @@
+"""Cold storage of old years in per-year SQLite files attached on demand.
+
+archive_before(cutoff) moves daily_records, daily_summaries and exercise_logs
+rows dated before ``cutoff`` into ``<db path>.archive/<year>.db`` and records
+the cutoff in app_meta. Reads ask sources() for the FROM expression of each
+table: the hot table itself when the date range starts at or after the
+cutoff, otherwise a UNION ALL of the hot table and the archive years the range
+overlaps, attached to that connection as ``archive_<year>`` (or, past
+MAX_ATTACHED_ARCHIVES years, copied into TEMP tables). The hot database
+keeps only recent rows, so its indexes stay small and cached and backing it up
+is quick.
+
+The derived tables (symptom_scores, json_entries, search_index,
+exercise_completions) and the columnar snapshot keep covering archived dates.
+Writing to an archived date first moves that date back into the hot database
+(thaw), so a date never lives in two places.
+"""
+from datetime import date as date_cls
+import itertools
+import os
+
+from . import json_entries, symptom_scores
+
+ARCHIVE_TABLES = ("daily_records", "daily_summaries", "exercise_logs")
+
+# FROM expressions when nothing is archived.
+HOT_SOURCES = {table: table for table in ARCHIVE_TABLES}
+
+# SQLite attaches at most 10 databases per connection by default; keep one spare.
+MAX_ATTACHED_ARCHIVES = 9
+
+# Suffixes of the TEMP tables sources() copies archive rows into past that limit.
+_spill_ids = itertools.count()
+
+
+def _schema(year: int) -> str:
+    return f"archive_{year}"
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _year_bounds(year: int, cutoff: str, ref: str = ""):
+    """WHERE clause and params selecting ``year``'s rows dated before cutoff (columns of alias ``ref``)."""
+    column = f"{ref}.date" if ref else "date"
+    return f"{column} >= ? AND {column} < ? AND {column} < ?", (f"{year}-", f"{year + 1}-", cutoff)
+
+
+class ArchiveStore:
+    def __init__(self, db_manager):
+        self.db = db_manager
+        # None for backends without a database file (memory): nothing is ever archived
+        self.root = f"{db_manager.db_path}.archive" if db_manager.db_path else None
+
+    def _path(self, year: int) -> str:
+        return os.path.join(self.root, f"{year}.db")
+
+    def get_cutoff(self, conn) -> str | None:
+        """First date kept in the hot database, or None if nothing was archived."""
+        row = conn.execute("SELECT value FROM app_meta WHERE key = 'archive_cutoff'").fetchone()
+        return row[0] if row else None
+
+    def get_years(self) -> list[int]:
+        if self.root is None or not os.path.isdir(self.root):
+            return []
+        return sorted(int(name[:-3]) for name in os.listdir(self.root) if name.endswith(".db") and name[:-3].isdigit())
+
+    def _attach(self, conn, year: int, create: bool = False):
+        schema = _schema(year)
+        attached = {row[1] for row in conn.execute("PRAGMA database_list")}
+        if schema in attached:
+            return schema
+        if not create and not os.path.exists(self._path(year)):
+            return None
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (self._path(year),))
+        if create:
+            # Same definitions as the hot tables, without their triggers
+            for table in ARCHIVE_TABLES:
+                sql = conn.execute(
+                    "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()[0]
+                conn.execute(sql.replace(f"CREATE TABLE {table}", f"CREATE TABLE IF NOT EXISTS {schema}.{table}", 1))
+            # Summaries and logs are keyed by date already
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {schema}.idx_daily_records_date ON daily_records (date)")
+        return schema
+
+    def _columns(self, conn, schema: str, table: str) -> list[str]:
+        return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table})")]
+
+    def sources(self, conn, start_date: str = None, end_date: str = None) -> dict:
+        """FROM expressions per ARCHIVE_TABLES for reads of [start_date, end_date] on ``conn``.
+
+        Attaches the archive years the range overlaps, so call it before
+        BEGIN; the returned expressions are only valid on this connection.
+        When that would exceed MAX_ATTACHED_ARCHIVES, the years' rows in range
+        are copied into TEMP tables instead, one attached year at a time.
+        """
+        if self.root is None:
+            return HOT_SOURCES
+        cutoff = self.get_cutoff(conn)
+        if cutoff is None or (start_date and start_date >= cutoff):
+            return HOT_SOURCES
+        first = int(start_date[:4]) if start_date and start_date[:4].isdigit() else None
+        last = int(end_date[:4]) if end_date and end_date[:4].isdigit() else None
+        years = [y for y in self.get_years() if (first is None or y >= first) and (last is None or y <= last)]
+        if not years:
+            return HOT_SOURCES
+        # The range is repeated in every branch so each one is an index range scan, also when joined
+        where = " AND ".join(
+            f"date {op} {_sql_literal(value)}" for op, value in ((">=", start_date), ("<=", end_date)) if value
+        ) or "1"
+        columns = {table: self._columns(conn, "main", table) for table in ARCHIVE_TABLES}
+        attached = [row[1] for row in conn.execute("PRAGMA database_list") if row[1].startswith("archive_")]
+        if len(attached) + len([y for y in years if _schema(y) not in attached]) <= MAX_ATTACHED_ARCHIVES:
+            schemas = [schema for schema in (self._attach(conn, year) for year in years) if schema]
+            archived = {
+                table: [self._select(conn, schema, table, columns[table], where) for schema in schemas]
+                for table in ARCHIVE_TABLES
+            }
+        else:
+            archived = self._spill(conn, years, columns, where)
+        return {
+            table: "(" + " UNION ALL ".join(
+                [f"SELECT {', '.join(columns[table])} FROM main.{table} WHERE {where}", *archived[table]]
+            ) + ")"
+            for table in ARCHIVE_TABLES
+        }
+
+    def _select(self, conn, schema: str, table: str, columns: list[str], where: str) -> str:
+        present = set(self._columns(conn, schema, table))
+        # Archives written before a column was added read it as NULL
+        select_list = ", ".join(col if col in present else f"NULL AS {col}" for col in columns)
+        return f"SELECT {select_list} FROM {schema}.{table} WHERE {where}"
+
+    def _spill(self, conn, years: list[int], columns: dict, where: str) -> dict:
+        """Copy ``years``' rows matching ``where`` into new TEMP tables; SELECTs of them per table."""
+        suffix = next(_spill_ids)
+        names = {table: f"archived_{table}_{suffix}" for table in ARCHIVE_TABLES}
+        for table, name in names.items():
+            conn.execute(f"CREATE TEMP TABLE {name} AS SELECT {', '.join(columns[table])} FROM main.{table} WHERE 0")
+            conn.execute(f"CREATE INDEX temp.{name}_date ON {name} (date)")
+        for year in years:
+            was_attached = _schema(year) in {row[1] for row in conn.execute("PRAGMA database_list")}
+            schema = self._attach(conn, year)
+            if schema is None:
+                continue
+            try:
+                for table, name in names.items():
+                    conn.execute(f"INSERT INTO temp.{name} {self._select(conn, schema, table, columns[table], where)}")
+                # DETACH is refused inside a transaction
+                conn.commit()
+            finally:
+                if not was_attached:
+                    conn.execute(f"DETACH DATABASE {schema}")
+        return {table: [f"SELECT {', '.join(columns[table])} FROM temp.{name}"] for table, name in names.items()}
+
+    def archive_before(self, cutoff: str) -> dict:
+        """Move rows dated before ``cutoff`` (YYYY-MM-DD) into the per-year files.
+
+        Returns {"cutoff", "years": {year: {table: rows moved}}}.
+        """
+        if self.root is None:
+            raise ValueError("Archiving needs a database file")
+        cutoff = date_cls.fromisoformat(cutoff).isoformat()
+        conn = self.db.get_connection()
+        try:
+            current = self.get_cutoff(conn)
+            if current is not None and cutoff < current:
+                raise ValueError(f"Data before {current} is already archived; the cutoff can only move forward")
+            years = set()
+            for table in ARCHIVE_TABLES:
+                years.update(
+                    int(row[0]) for row in conn.execute(
+                        f"SELECT DISTINCT substr(date, 1, 4) FROM {table} "
+                        "WHERE date < ? AND date GLOB '[0-9][0-9][0-9][0-9]-*'",
+                        (cutoff,)
+                    )
+                )
+            os.makedirs(self.root, exist_ok=True)
+            # Readers union the archives from now on; each row is in exactly one place at every commit
+            conn.execute("INSERT OR REPLACE INTO app_meta (key, value) VALUES ('archive_cutoff', ?)", (cutoff,))
+            conn.commit()
+            moved = {}
+            for year in sorted(years):
+                moved[year] = self._move(conn, year, cutoff, to_archive=True)
+        finally:
+            conn.close()
+        return {"cutoff": cutoff, "years": moved}
+
+    def _move(self, conn, year: int, cutoff: str, to_archive: bool, only_date: str = None):
+        """Move one year's rows (or just ``only_date``'s) between the hot database and its archive."""
+        schema = self._attach(conn, year, create=to_archive)
+        bounds, bound_params = _year_bounds(year, cutoff)
+        if only_date:
+            bounds, bound_params = f"{bounds} AND date = ?", (*bound_params, only_date)
+        source, target = ("main", schema) if to_archive else (schema, "main")
+        counts = {}
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for table in ARCHIVE_TABLES:
+                columns = ", ".join(
+                    col for col in self._columns(conn, source, table) if col in set(self._columns(conn, target, table))
+                )
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {target}.{table} ({columns}) "
+                    f"SELECT {columns} FROM {source}.{table} WHERE {bounds}",
+                    bound_params
+                )
+                counts[table] = conn.execute(f"DELETE FROM {source}.{table} WHERE {bounds}", bound_params).rowcount
+            if to_archive:
+                # The hot tables' delete triggers dropped these dates' derived rows; re-derive them from the archive
+                src_bounds, src_params = _year_bounds(year, cutoff, "src")
+                symptom_scores.insert_from(conn, schema, src_bounds, src_params)
+                json_entries.insert_from(conn, schema, src_bounds, src_params)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute(f"DETACH DATABASE {schema}")
+        return counts
+
+    def insert_symptom_scores(self, conn):
+        """Add every archive year's built-in symptom scores (after symptom_scores.rebuild)."""
+        for year in self.get_years():
+            schema = self._attach(conn, year)
+            try:
+                symptom_scores.insert_from(conn, schema)
+                conn.commit()
+            finally:
+                conn.execute(f"DETACH DATABASE {schema}")
+
+    def thaw(self, date: str):
+        """Move an archived date back into the hot database before it is written to."""
+        if self.root is None:
+            return
+        conn = self.db.get_connection()
+        try:
+            cutoff = self.get_cutoff(conn)
+            if cutoff is None or date >= cutoff or not date[:4].isdigit():
+                return
+            if os.path.exists(self._path(int(date[:4]))):
+                self._move(conn, int(date[:4]), cutoff, to_archive=False, only_date=date)
+        finally:
+            conn.close()
+
+    def thaw_record(self, record_id: int):
+        """thaw() the date of an archived record, looked up by id."""
+        if self.root is None:
+            return
+        conn = self.db.get_connection()
+        row = None
+        try:
+            if conn.execute("SELECT 1 FROM daily_records WHERE id = ?", (record_id,)).fetchone():
+                return
+            for year in self.get_years():
+                schema = self._attach(conn, year)
+                row = conn.execute(f"SELECT date FROM {schema}.daily_records WHERE id = ?", (record_id,)).fetchone()
+                conn.execute(f"DETACH DATABASE {schema}")
+                if row:
+                    break
+        finally:
+            conn.close()
+        if row:
+            self.thaw(row[0])
+
+    def get_status(self) -> dict:
+        """The cutoff and, per archive year, its file size and row counts."""
+        conn = self.db.get_connection()
+        try:
+            cutoff = self.get_cutoff(conn) if self.root else None
+            years = []
+            for year in self.get_years():
+                schema = self._attach(conn, year)
+                counts = {table: conn.execute(f"SELECT count(*) FROM {schema}.{table}").fetchone()[0]
+                          for table in ARCHIVE_TABLES}
+                conn.execute(f"DETACH DATABASE {schema}")
+                years.append({"year": year, "bytes": os.path.getsize(self._path(year)), **counts})
+        finally:
+            conn.close()
+        return {"cutoff": cutoff, "years": years}
@@ -0,0 +1,128 @@
+"""Storage backends behind DBManager.get_connection, and the optional DuckDB analytics engine.
+
+Every CRUD class speaks SQLite SQL (JSON1, FTS5, triggers), so a backend
+decides where the SQLite database lives rather than which SQL dialect runs:
+
+- ``sqlite``: a database file (the default).
+- ``memory``: a named in-memory database shared by all connections of the
+  process; nothing is written to disk. Meant for tests and throwaway
+  deployments.
+
+The SQL aggregates of analytics (activity attribution, completeness
+coverage and missing slots, exercise streaks and rates) can additionally run
+in DuckDB over the SQLite file (``HEALTH_ANALYTICS_ENGINE=duckdb``); without
+the ``duckdb`` package or its sqlite extension they stay on SQLite. Symptom
+level analytics read the columnar snapshot instead.
+"""
+import logging
+import os
+import sqlite3
+import uuid
+
+DB_BACKEND_ENV = "HEALTH_DB_BACKEND"
+DB_PATH_ENV = "HEALTH_DB_PATH"
+ANALYTICS_ENGINE_ENV = "HEALTH_ANALYTICS_ENGINE"
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteFileBackend:
+    name = "sqlite"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, check_same_thread=check_same_thread)
+
+    def close(self):
+        pass
+
+
+class MemoryBackend:
+    """A shared-cache in-memory SQLite database.
+
+    One connection stays open for the backend's lifetime so the data outlives
+    the short-lived connections the CRUD classes open per call. Shared-cache
+    databases lock per table, so concurrent writers may see "database table
+    is locked"; this backend is not meant for concurrent production traffic.
+    """
+
+    name = "memory"
+    path = None
+
+    def __init__(self, name: str = None):
+        self.uri = f"file:health_{name or uuid.uuid4().hex}?mode=memory&cache=shared"
+        self._keeper = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+
+    def connect(self, check_same_thread: bool = True) -> sqlite3.Connection:
+        return sqlite3.connect(self.uri, uri=True, check_same_thread=check_same_thread)
+
+    def close(self):
+        self._keeper.close()
+
+
+BACKENDS = {
+    SQLiteFileBackend.name: SQLiteFileBackend,
+    MemoryBackend.name: MemoryBackend,
+}
+
+
+def create_backend(default_path: str):
+    """Build the backend named by HEALTH_DB_BACKEND (file path from HEALTH_DB_PATH)."""
+    name = os.environ.get(DB_BACKEND_ENV, SQLiteFileBackend.name).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"{DB_BACKEND_ENV} must be one of {', '.join(BACKENDS)}, got {name!r}")
+    if name == MemoryBackend.name:
+        return MemoryBackend()
+    return SQLiteFileBackend(os.environ.get(DB_PATH_ENV, default_path))
+
+
+class DuckDBAnalytics:
+    """Runs read-only aggregate queries in DuckDB against the SQLite database file.
+
+    Queries are rendered for ``dialect`` (``?`` parameters, no SQLite-only
+    functions); callers fall back to SQLite on ``self.Error``.
+    """
+
+    dialect = "duckdb"
+
+    def __init__(self, path: str):
+        import duckdb
+
+        self.Error = duckdb.Error
+        self._conn = duckdb.connect()
+        self._conn.execute("INSTALL sqlite")
+        self._conn.execute("LOAD sqlite")
+        escaped = path.replace("'", "''")
+        self._conn.execute(f"ATTACH '{escaped}' AS health (TYPE sqlite, READ_ONLY)")
+        self._conn.execute("USE health")
+
+    def fetchall(self, sql: str, params=()) -> list[tuple]:
+        # A cursor is a separate connection to the same database, safe to use per thread
+        cursor = self._conn.cursor()
+        try:
+            return cursor.execute(sql, list(params)).fetchall()
+        finally:
+            cursor.close()
+
+    def close(self):
+        self._conn.close()
+
+
+def create_analytics_engine(backend):
+    """The engine named by HEALTH_ANALYTICS_ENGINE, or None to query SQLite directly."""
+    name = os.environ.get(ANALYTICS_ENGINE_ENV, "sqlite").lower()
+    if name == "sqlite":
+        return None
+    if name != "duckdb":
+        raise ValueError(f"{ANALYTICS_ENGINE_ENV} must be sqlite or duckdb, got {name!r}")
+    if backend.path is None:
+        logger.warning("duckdb analytics needs a database file; backend=%s stays on sqlite", backend.name)
+        return None
+    try:
+        return DuckDBAnalytics(backend.path)
+    except Exception as e:
+        # duckdb missing, or its sqlite extension cannot be installed/loaded
+        logger.warning("duckdb analytics unavailable error=%s", e)
+        return None
@@ -0,0 +1,443 @@
+"""Online backups of the live database through SQLite's backup API.
+
+A backup copies HEALTH_BACKUP_PAGES_PER_STEP pages per step and sleeps
+briefly between steps; in WAL mode each step only holds a read snapshot, so
+writers are never blocked and requests see no latency spike. A write from
+another connection restarts the copy; after MAX_RESTARTS restarts the backup
+finishes in a single step instead (still one read transaction, still not
+blocking writers). Each copy is integrity-checked, then renamed to
+``health-YYYYmmdd-HHMMSS.db`` in the backup directory, and all but the newest
+HEALTH_BACKUP_KEEP files are removed.
+
+With HEALTH_BACKUP_INTERVAL_HOURS set, every worker runs a scheduler thread;
+app_meta records when the last scheduled backup started, so one worker takes
+each slot. Progress and the last result are kept in ``status.json`` next to
+the backups, readable from any worker.
+
+Archived years (see archive.py) are separate files; each backup copies them
+into ``health-YYYYmmdd-HHMMSS.archive/`` next to its database file, and the
+whole set is taken again if an archive file changes while it is copied.
+Restoring brings the backup up to the current schema in a staging copy,
+then replaces the database and the archive years together, and refuses a
+backup whose database points to archived years it does not contain. From the
+backend directory:
+
+    python -m app.db.backups backup [--db health_records.db]
+    python -m app.db.backups list
+    python -m app.db.backups restore health-20240101-030000.db
+"""
+import argparse
+from datetime import datetime
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from .backends import DB_PATH_ENV
+from .database import DB_PATH, DBManager, db_manager
+
+BACKUP_DIR_ENV = "HEALTH_BACKUP_DIR"
+BACKUP_INTERVAL_ENV = "HEALTH_BACKUP_INTERVAL_HOURS"
+BACKUP_KEEP_ENV = "HEALTH_BACKUP_KEEP"
+BACKUP_PAGES_ENV = "HEALTH_BACKUP_PAGES_PER_STEP"
+
+DEFAULT_KEEP = 7
+# 256 pages of 4 KiB: about 1 MiB per step
+DEFAULT_PAGES_PER_STEP = 256
+STEP_SLEEP_SECONDS = 0.01
+MAX_RESTARTS = 5
+
+# How often scheduler threads check whether a scheduled backup is due.
+SCHEDULE_POLL_SECONDS = 60
+# Minimum time between writes of status.json while a backup is running.
+STATUS_WRITE_SECONDS = 0.5
+
+NAME_PREFIX = "health-"
+NAME_FORMAT = f"{NAME_PREFIX}%Y%m%d-%H%M%S.db"
+STATUS_FILE = "status.json"
+
+logger = logging.getLogger(__name__)
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _archive_dir(backup_path: str) -> str:
+    """The directory holding a backup's archive years."""
+    return f"{backup_path[:-3] if backup_path.endswith('.db') else backup_path}.archive"
+
+
+def _copy_file(src_path: str, dst_path: str):
+    """Consistent single-file copy of a SQLite database through the backup API."""
+    src = sqlite3.connect(f"file:{src_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(dst_path)
+    try:
+        src.backup(dst)
+        dst.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        dst.close()
+        src.close()
+
+
+class BackupStore:
+    def __init__(self, db_manager, directory: str = None, keep: int = DEFAULT_KEEP,
+                 pages_per_step: int = DEFAULT_PAGES_PER_STEP, interval_hours: float = 0):
+        self.db = db_manager
+        # None disables backups (the memory backend without an explicit directory)
+        self.directory = directory or (f"{db_manager.db_path}.backups" if db_manager.db_path else None)
+        self.keep = keep
+        self.pages_per_step = pages_per_step
+        self.interval_hours = interval_hours
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _require_directory(self) -> str:
+        if self.directory is None:
+            raise ValueError(f"Backups need a database file or {BACKUP_DIR_ENV}")
+        return self.directory
+
+    def list_backups(self) -> list[dict]:
+        """Backup files, newest first."""
+        if self.directory is None or not os.path.isdir(self.directory):
+            return []
+        backups = []
+        for name in sorted(os.listdir(self.directory), reverse=True):
+            if not (name.startswith(NAME_PREFIX) and name.endswith(".db")):
+                continue
+            try:
+                created_at = datetime.strptime(name, NAME_FORMAT).isoformat()
+            except ValueError:
+                continue
+            path = os.path.join(self.directory, name)
+            archive = _archive_dir(path)
+            archive_files = os.listdir(archive) if os.path.isdir(archive) else []
+            backups.append({
+                "name": name,
+                "bytes": os.path.getsize(path),
+                "archive_years": len(archive_files),
+                "archive_bytes": sum(os.path.getsize(os.path.join(archive, f)) for f in archive_files),
+                "created_at": created_at,
+            })
+        return backups
+
+    def read_status(self) -> dict:
+        """The running backup's progress, or the last backup's result ({} before the first)."""
+        if self.directory is None:
+            return {}
+        try:
+            with open(os.path.join(self.directory, STATUS_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_status(self, status: dict):
+        path = os.path.join(self.directory, STATUS_FILE)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(status, f)
+        os.replace(f"{path}.tmp", path)
+
+    def is_running(self) -> bool:
+        return self._lock.locked()
+
+    def run(self, reason: str = "manual") -> dict:
+        """Back up the live database now; returns the final status.
+
+        Raises RuntimeError if this process is already running a backup.
+        """
+        directory = self._require_directory()
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A backup is already running")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            return self._run(directory, reason)
+        finally:
+            self._lock.release()
+
+    def _run(self, directory: str, reason: str) -> dict:
+        now = datetime.now()
+        name = now.strftime(NAME_FORMAT)
+        path = os.path.join(directory, name)
+        status = {
+            "state": "running", "reason": reason, "name": name, "started_at": now.isoformat(timespec="seconds"),
+            "pages_total": 0, "pages_done": 0, "restarts": 0, "single_step": False,
+            "archive_restarts": 0,
+        }
+        self._write_status(status)
+        started = time.monotonic()
+        last_write = started
+        last_remaining = None
+
+        def progress(_, remaining, total):
+            nonlocal last_write, last_remaining
+            if last_remaining is not None and remaining > last_remaining:
+                # Another connection wrote to the database and SQLite started over
+                status["restarts"] += 1
+                if status["restarts"] > MAX_RESTARTS:
+                    raise _TooManyRestarts()
+            last_remaining = remaining
+            status["pages_total"], status["pages_done"] = total, total - remaining
+            if time.monotonic() - last_write >= STATUS_WRITE_SECONDS:
+                last_write = time.monotonic()
+                self._write_status(status)
+            if remaining:
+                # backup()'s own sleep only applies to busy retries; this paces the steps
+                time.sleep(STEP_SLEEP_SECONDS)
+
+        partial = f"{path}.partial"
+        archive_partial = f"{_archive_dir(path)}.partial"
+        try:
+            for attempt in range(MAX_RESTARTS + 1):
+                # An archive move between the two copies would leave rows in neither or both
+                archive_state = self._archive_state()
+                last_remaining = None
+                self._copy_database(partial, status, progress)
+                status["archive_years"] = self._copy_archive(archive_partial)
+                if self._archive_state() == archive_state:
+                    break
+                status["archive_restarts"] = attempt + 1
+            else:
+                raise RuntimeError("The archive kept changing during the backup")
+            if os.path.exists(archive_partial):
+                os.replace(archive_partial, _archive_dir(path))
+            os.replace(partial, path)
+        except Exception as e:
+            if os.path.exists(partial):
+                os.remove(partial)
+            shutil.rmtree(archive_partial, ignore_errors=True)
+            status.update(state="failed", error=str(e), duration_seconds=round(time.monotonic() - started, 3))
+            self._write_status(status)
+            raise
+
+        status.update(
+            state="done", bytes=os.path.getsize(path), duration_seconds=round(time.monotonic() - started, 3),
+            finished_at=datetime.now().isoformat(timespec="seconds"),
+        )
+        self._write_status(status)
+        self._prune(directory)
+        logger.info("backup name=%s bytes=%d seconds=%.3f restarts=%d",
+                    name, status["bytes"], status["duration_seconds"], status["restarts"])
+        return status
+
+    def _copy_database(self, partial: str, status: dict, progress):
+        src = self.db.get_connection()
+        dst = sqlite3.connect(partial)
+        try:
+            try:
+                src.backup(dst, pages=self.pages_per_step, progress=progress)
+            except _TooManyRestarts:
+                status["single_step"] = True
+                src.backup(dst)
+            # The copy inherits WAL mode; a rollback journal keeps the backup a single file
+            dst.execute("PRAGMA journal_mode=DELETE")
+            check = dst.execute("PRAGMA quick_check").fetchone()[0]
+            status["pages_total"] = status["pages_done"] = dst.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dst.close()
+            src.close()
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"Backup failed its integrity check: {check}")
+
+    def _archive_state(self) -> dict:
+        """(size, mtime) per file of the archive directory; archive moves change it."""
+        root = self.db.archive.root
+        if root is None or not os.path.isdir(root):
+            return {}
+        return {
+            name: (stat.st_size, stat.st_mtime_ns)
+            for name in os.listdir(root)
+            for stat in (os.stat(os.path.join(root, name)),)
+        }
+
+    def _copy_archive(self, target: str) -> int:
+        """Copy every archive year into ``target``; returns the number of years."""
+        shutil.rmtree(target, ignore_errors=True)
+        root = self.db.archive.root
+        if root is None or not os.path.isdir(root):
+            return 0
+        # Created even when empty: restore requires it whenever the database has an archive cutoff
+        os.makedirs(target)
+        years = self.db.archive.get_years()
+        for year in years:
+            _copy_file(os.path.join(root, f"{year}.db"), os.path.join(target, f"{year}.db"))
+        return len(years)
+
+    def _prune(self, directory: str):
+        for backup in self.list_backups()[max(self.keep, 1):]:
+            os.remove(os.path.join(directory, backup["name"]))
+            shutil.rmtree(_archive_dir(os.path.join(directory, backup["name"])), ignore_errors=True)
+
+    def _resolve(self, name_or_path: str) -> str:
+        if os.path.sep not in name_or_path and self.directory:
+            candidate = os.path.join(self.directory, name_or_path)
+            if os.path.exists(candidate):
+                return candidate
+        if not os.path.exists(name_or_path):
+            raise ValueError(f"No backup named {name_or_path!r}")
+        return name_or_path
+
+    def restore(self, name_or_path: str) -> dict:
+        """Replace the live database's contents with a backup (a name in the backup directory, or a path).
+
+        The backup and its archive years (``<backup>.archive/``) are first
+        copied into ``<db path>.restore/`` and opened there, which brings a
+        backup taken by an earlier version up to the current schema (derived
+        tables, triggers, JSON repair, compression). Only then is the live
+        database overwritten and the archive directory swapped in; a failure
+        before that leaves both untouched. A backup with an archive cutoff but
+        no archive directory is refused. Other connections keep working and
+        read the restored data from their next transaction; data_version
+        moves past its pre-restore value so no cached result or analytics
+        snapshot of the replaced data is reused.
+        """
+        path = self._resolve(name_or_path)
+        archive = _archive_dir(path)
+        years = sorted(name for name in os.listdir(archive) if name.endswith(".db")) if os.path.isdir(archive) else []
+        for file in (path, *(os.path.join(archive, name) for name in years)):
+            self._check_backup(file)
+        src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            cutoff = src.execute("SELECT value FROM app_meta WHERE key = 'archive_cutoff'").fetchone()
+        except sqlite3.OperationalError:
+            # Taken before app_meta existed
+            cutoff = None
+        finally:
+            src.close()
+        if cutoff and not os.path.isdir(archive):
+            raise ValueError(f"{path} has years archived before {cutoff[0]} but no {archive} directory")
+        if years and self.db.archive.root is None:
+            raise ValueError("Archived years can only be restored into a database file")
+
+        started = time.monotonic()
+        # Next to the live files, so the archive directory can be swapped in with a rename
+        stage = f"{self.db.db_path}.restore" if self.db.db_path else tempfile.mkdtemp()
+        shutil.rmtree(stage, ignore_errors=True)
+        os.makedirs(stage)
+        try:
+            staged_path = os.path.join(stage, os.path.basename(path))
+            _copy_file(path, staged_path)
+            if os.path.isdir(archive):
+                os.makedirs(f"{staged_path}.archive")
+                for name in years:
+                    _copy_file(os.path.join(archive, name), os.path.join(f"{staged_path}.archive", name))
+            staged = DBManager(staged_path, compress_text_min_bytes=self.db.compress_text_min_bytes)
+            previous = self.db.get_data_version()
+            src = staged.get_connection()
+            dst = self.db.get_connection()
+            try:
+                src.execute(
+                    "UPDATE app_meta SET value = max(CAST(value AS INTEGER), ?) WHERE key = 'data_version'",
+                    (previous + 1,)
+                )
+                src.commit()
+                src.backup(dst)
+            finally:
+                src.close()
+                dst.close()
+            self._swap_archive(f"{staged_path}.archive")
+        finally:
+            shutil.rmtree(stage, ignore_errors=True)
+        return {
+            "restored": path, "archive_years": len(years), "duration_seconds": round(time.monotonic() - started, 3)
+        }
+
+    def _check_backup(self, path: str):
+        src = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            check = src.execute("PRAGMA quick_check").fetchone()[0]
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"{path} is not a SQLite database: {e}")
+        finally:
+            src.close()
+        if check != "ok":
+            raise ValueError(f"{path} failed its integrity check: {check}")
+
+    def _swap_archive(self, staged: str):
+        """Replace the archive directory with ``staged`` (or remove it when the backup had none)."""
+        root = self.db.archive.root
+        if root is None:
+            return
+        # Connections that still have an old year attached keep reading it until they detach
+        old = f"{root}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.isdir(root):
+            os.replace(root, old)
+        if os.path.isdir(staged):
+            os.replace(staged, root)
+        shutil.rmtree(old, ignore_errors=True)
+
+    def _schedule_loop(self):
+        while not self._stop.wait(SCHEDULE_POLL_SECONDS):
+            try:
+                if not self.is_running() and self.db.claim_schedule("backup_scheduled_at", self.interval_hours):
+                    self.run("scheduled")
+            except Exception:
+                logger.exception("Scheduled backup failed")
+
+    def start(self):
+        """Start the scheduler thread if HEALTH_BACKUP_INTERVAL_HOURS is set."""
+        if not self.interval_hours or self.directory is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._schedule_loop, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def create_backup_store(db_manager) -> BackupStore:
+    """BackupStore configured from the HEALTH_BACKUP_* environment variables."""
+    return BackupStore(
+        db_manager,
+        directory=os.environ.get(BACKUP_DIR_ENV) or None,
+        keep=int(os.environ.get(BACKUP_KEEP_ENV, DEFAULT_KEEP)),
+        pages_per_step=int(os.environ.get(BACKUP_PAGES_ENV, DEFAULT_PAGES_PER_STEP)),
+        interval_hours=float(os.environ.get(BACKUP_INTERVAL_ENV, 0)),
+    )
+
+
+backup_store = create_backup_store(db_manager)
+
+
+def get_backups():
+    return backup_store
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=os.environ.get(DB_PATH_ENV, DB_PATH), help="path to the SQLite database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("backup", help="back up the database now")
+    commands.add_parser("list", help="list the backups, newest first")
+    restore = commands.add_parser("restore", help="replace the database's contents with a backup")
+    restore.add_argument("backup", help="backup file name in the backup directory, or a path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = create_backup_store(DBManager(args.db))
+    if args.command == "backup":
+        status = store.run()
+        print(f"Wrote {status['name']} ({status['bytes']} bytes) in {status['duration_seconds']}s")
+    elif args.command == "list":
+        for backup in store.list_backups():
+            print(f"{backup['name']}\t{backup['bytes']}")
+    else:
+        try:
+            result = store.restore(args.backup)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Restored {result['restored']} ({result['archive_years']} archive years) into {args.db} "
+              f"in {result['duration_seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,236 @@
-from .database import DBManager
+from datetime import datetime
+
+from . import exercise_completions, search_index, text_codec
+from .archive import HOT_SOURCES
+from .symptom_scores import DAY_SLOT
+from .database import DBManager, JSON_COLUMNS, calendar_cte, logger
+
+# Per-slot fields stored on daily_records.
+SLOT_FIELD_DEFAULTS = {
+    "pain_level": 0,
+    "dizziness_level": 0,
+    "mood_level": 0,
+}
+
+# Per-day fields; daily_summaries wins over the (legacy) daily_records copy.
+SUMMARY_FIELD_DEFAULTS = {
+    "stomach_level": 0,
+    "throat_level": 0,
+    "dry_eye_level": 0,
+    "fatigue_level": 0,
+    "sleep_note": "",
+    "daily_activity_note": "",
+    "pain_increasing_activities": "",
+    "pain_decreasing_activities": "",
+    "dizziness_increasing_activities": "",
+    "dizziness_decreasing_activities": "",
+    "medication_used": 0,
+    "medication_note": "",
+    "notes": "{}",
+    "triggers": "{}",
+    "interventions": "{}"
+}
+
+
+def _sql_literal(value) -> str:
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def _check_date(value) -> str:
+    """Return a YYYY-MM-DD date unchanged, or raise ValueError."""
+    try:
+        datetime.strptime(value, "%Y-%m-%d")
+    except (TypeError, ValueError):
+        raise ValueError("Invalid date format, expected YYYY-MM-DD")
+    return value
+
+
+def _build_record_select():
+    """Column expressions for the daily_records ⟕ daily_summaries read, with defaults applied in SQL."""
+    columns = {
+        "id": "r.id",
+        "date": "r.date",
+        "time_of_day": "CASE r.time_of_day WHEN '早起时' THEN '起床' WHEN '中午' THEN '下午' ELSE r.time_of_day END",
+    }
+    for col, default in SLOT_FIELD_DEFAULTS.items():
+        columns[col] = f"COALESCE(r.{col}, {_sql_literal(default)})"
+    # Legacy rows kept the body feeling in notes["General"]
+    columns["body_feeling_note"] = (
+        f"COALESCE(NULLIF({text_codec.sql('r.body_feeling_note')}, ''), NULLIF(CASE WHEN json_valid(r.notes) "
+        "THEN json_extract(r.notes, '$.General') ELSE r.notes END, ''), '')"
+    )
+    for col, default in SUMMARY_FIELD_DEFAULTS.items():
+        value = f"CASE WHEN s.date IS NULL THEN r.{col} ELSE s.{col} END"
+        if col in text_codec.COMPRESSED_TEXT_COLUMNS["daily_summaries"]:
+            value = text_codec.sql(value)
+        columns[col] = f"COALESCE({value}, {_sql_literal(default)})"
+    columns["created_at"] = "r.created_at"
+    return columns
+
+
+RECORD_EXPRESSIONS = _build_record_select()
+RECORD_COLUMNS = tuple(RECORD_EXPRESSIONS)
+
+
+def record_select(fields=RECORD_COLUMNS, sources=HOT_SOURCES) -> str:
+    """SELECT for a projection of RECORD_COLUMNS; the summary join is skipped when unused.
+
+    ``sources`` are the FROM expressions from ArchiveStore.sources.
+    """
+    select_list = ",\n    ".join(f"{RECORD_EXPRESSIONS[name]} AS {name}" for name in fields)
+    sql = f"SELECT\n    {select_list}\nFROM {sources['daily_records']} r"
+    if any(name in SUMMARY_FIELD_DEFAULTS for name in fields):
+        sql += f"\nLEFT JOIN {sources['daily_summaries']} s ON s.date = r.date"
+    return sql
+
+
+RECORD_SELECT = record_select()
+
+# Canonical time-of-day slots, in display order.
+TIME_SLOTS = ("起床", "上午", "下午", "晚上")
+
+# (slot, legacy alias) pairs, also as a VALUES list for SQL anti-joins.
+_SLOT_ALIASES = (("起床", "早起时"), ("上午", "上午"), ("下午", "中午"), ("晚上", "晚上"))
+_SLOT_VALUES = "VALUES " + ", ".join(f"('{slot}', '{alias}')" for slot, alias in _SLOT_ALIASES)
+_CANONICAL_SLOTS = {alias: slot for slot, alias in _SLOT_ALIASES}
+
+# strftime formats for completeness periods.
+PERIOD_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%Y-W%W",
+    "month": "%Y-%m",
+}
+
+# Symptom level columns available per day (slot levels are averaged).
+DAILY_SYMPTOM_COLUMNS = (
+    "pain_level",
+    "dizziness_level",
+    "mood_level",
+    "stomach_level",
+    "throat_level",
+    "dry_eye_level",
+    "fatigue_level",
+)
+
+SUMMARY_COLUMNS = ("date", *SUMMARY_FIELD_DEFAULTS, "created_at")
+
+# Every daily_summaries column as stored (no defaults), with compressed text inflated.
+SUMMARY_TABLE_SELECT = ", ".join(
+    f"{text_codec.sql(col)} AS {col}" if col in text_codec.COMPRESSED_TEXT_COLUMNS["daily_summaries"] else col
+    for col in SUMMARY_COLUMNS
+)
+
+# Numeric columns copied into the columnar analytics snapshot.
+SNAPSHOT_LEVEL_COLUMNS = DAILY_SYMPTOM_COLUMNS
+
+
+def _build_snapshot_select(sources=HOT_SOURCES):
+    """(date ordinal, slot index, levels...) per record; julianday - 1721424.5 is date.toordinal()."""
+    slot_index = " ".join(
+        f"WHEN '{name}' THEN {TIME_SLOTS.index(slot)}"
+        for slot, alias in _SLOT_ALIASES
+        for name in dict.fromkeys((slot, alias))
+    )
+    levels = ",\n    ".join(
+        f"COALESCE(r.{col}, -1)" if col in SLOT_FIELD_DEFAULTS else f"COALESCE(s.{col}, r.{col}, -1)"
+        for col in SNAPSHOT_LEVEL_COLUMNS
+    )
+    return (
+        "SELECT\n"
+        "    CAST(julianday(r.date) - 1721424.5 AS INTEGER),\n"
+        f"    CASE r.time_of_day {slot_index} ELSE -1 END,\n"
+        f"    {levels}\n"
+        f"FROM {sources['daily_records']} r\n"
+        f"LEFT JOIN {sources['daily_summaries']} s ON s.date = r.date"
+    )
+
+
+SNAPSHOT_SELECT = _build_snapshot_select()
+
+# Always returned with a projection so rows stay addressable.
+RECORD_KEY_FIELDS = ("id", "date", "time_of_day")
+
+
+def parse_fields(fields: str, allowed, required=()) -> tuple:
+    """Parse a comma-separated field list into a validated column projection.
+
+    An empty value selects every allowed column; ``required`` columns are always included.
+    """
+    if not fields:
+        return tuple(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+    return tuple(dict.fromkeys([*required, *requested]))
+
+
+def _date_filter(column: str, start_date: str = None, end_date: str = None):
+    """WHERE clause and params for an optional, order-insensitive date range."""
+    clauses, params = [], []
+    if start_date and end_date and end_date < start_date:
+        start_date, end_date = end_date, start_date
+    if start_date:
+        clauses.append(f"{column} >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append(f"{column} <= ?")
+        params.append(end_date)
+    return (" AND ".join(clauses) or "1"), tuple(params)
+
+
+def _day_number(expr: str, dialect: str) -> str:
+    """Days since a fixed epoch of an ISO date expression; differences count calendar days."""
+    if dialect == "duckdb":
+        return f"(CAST({expr} AS DATE) - DATE '1970-01-01')"
+    return f"julianday({expr})"
+
+
+def _shift_date(expr: str, days: int, dialect: str) -> str:
+    """The ISO date ``days`` after an ISO date expression."""
+    if dialect == "duckdb":
+        return f"strftime(CAST({expr} AS DATE) + {days}, '%Y-%m-%d')"
+    return f"date({expr}, '{days:+d} days')"
+
+
+def _format_date(fmt: str, expr: str, dialect: str) -> str:
+    if dialect == "duckdb":
+        return f"strftime(CAST({expr} AS DATE), '{fmt}')"
+    return f"strftime('{fmt}', {expr})"
+
+
+def _iter_aggregate(db, build_sql, params: tuple, start_date: str = None, end_date: str = None,
+                    use_engine: bool = True):
+    """Rows of an aggregate query, from the DuckDB engine when configured (and ``use_engine``), else SQLite.
+
+    ``build_sql(sources, dialect)`` renders the query over ArchiveStore.sources
+    for the date range, in the engine's dialect or "sqlite".
+    """
+    conn = db.get_connection()
+    try:
+        sources = db.archive.sources(conn, start_date, end_date)
+        engine = db.analytics_engine if use_engine else None
+        # The engine sees the hot file only; ranges reaching into the archive stay on SQLite
+        if engine is not None and sources is HOT_SOURCES:
+            try:
+                rows = engine.fetchall(build_sql(sources, engine.dialect), params)
+            except engine.Error as e:
+                logger.warning("duckdb aggregate failed, using sqlite error=%s", e)
+            else:
+                yield from rows
+                return
+        yield from conn.execute(build_sql(sources, "sqlite"), params)
+    finally:
+        conn.close()
+
+# Well below SQLite's bound-parameter limit (999 on older builds).
+SUMMARY_LOOKUP_CHUNK = 500
 
 class RecordCRUD:
     def __init__(self, db_manager: DBManager):
         self.db = db_manager
-        self._record_defaults = {
-            "pain_level": 0,
-            "dizziness_level": 0,
-            "mood_level": 0,
-            "body_feeling_note": "",
-            "stomach_level": 0,
-            "throat_level": 0,
-            "dry_eye_level": 0,
-            "fatigue_level": 0,
-            "sleep_note": "",
-            "daily_activity_note": "",
-            "pain_increasing_activities": "",
-            "pain_decreasing_activities": "",
-            "dizziness_increasing_activities": "",
-            "dizziness_decreasing_activities": "",
-            "medication_used": 0,
-            "medication_note": "",
-            "notes": {},
-            "triggers": {},
-            "interventions": {}
-        }
 
     def _normalize_time_of_day(self, time_of_day: str) -> str:
         if time_of_day == "早起时":
@@ -40,6 +247,48 @@ class RecordCRUD:
             return ["下午", "中午"]
         return [normalized]
 
+    def _json_value(self, value, raw_json: bool):
+        """Decode a stored JSON column, or keep it as JSON text when raw_json is set."""
+        if raw_json:
+            return self.db._raw_json(value)
+        return self.db._parse_json(value)
+
+    def _record_row_factory(self, raw_json: bool, fields=RECORD_COLUMNS):
+        decode = self.db._raw_json if raw_json else self.db._parse_json
+        json_columns = [col for col in JSON_COLUMNS["daily_records"] if col in fields]
+        has_medication = "medication_used" in fields
+
+        def factory(cursor, row):
+            record = dict(zip(fields, row))
+            if has_medication:
+                record["medication_used"] = bool(record["medication_used"])
+            for col in json_columns:
+                record[col] = decode(record[col])
+            return record
+
+        return factory
+
+    def _select_records(
+        self, where: str, params: tuple, order_by: str, raw_json: bool = False, conn=None, fields=RECORD_COLUMNS,
+        span=(None, None)
+    ):
+        """Records matching ``where``; ``span`` is the (start, end) date range it can match, for archive reads."""
+        own_conn = conn is None
+        if own_conn:
+            conn = self.db.get_connection()
+        sources = self.db.archive.sources(conn, *span)
+        cursor = conn.cursor()
+        cursor.row_factory = self._record_row_factory(raw_json, fields)
+        if fields is RECORD_COLUMNS and sources is HOT_SOURCES:
+            select = RECORD_SELECT
+        else:
+            select = record_select(fields, sources)
+        cursor.execute(f"{select}\nWHERE {where}\nORDER BY {order_by}", params)
+        records = cursor.fetchall()
+        if own_conn:
+            conn.close()
+        return records
+
     def _get_existing_record_id(self, cursor, date: str, time_of_day: str):
         for candidate in self._time_of_day_aliases(time_of_day):
             cursor.execute(
@@ -52,6 +301,7 @@ class RecordCRUD:
         return None
 
     def upsert_summary(self, summary_data: dict):
+        self.db.archive.thaw(summary_data["date"])
         conn = self.db.get_connection()
         cursor = conn.cursor()
 
@@ -63,6 +313,8 @@ class RecordCRUD:
         exists = cursor.fetchone()
 
         if exists:
+            if self.db.fts_enabled:
+                search_index.unindex_summary(cursor, summary_data["date"])
             cursor.execute(
                 """
                 UPDATE daily_summaries SET
@@ -88,14 +340,14 @@ class RecordCRUD:
                     summary_data.get("throat_level", 0),
                     summary_data.get("dry_eye_level", 0),
                     summary_data.get("fatigue_level", 0),
-                    summary_data.get("sleep_note", ""),
-                    summary_data.get("daily_activity_note", ""),
-                    summary_data.get("pain_increasing_activities", ""),
-                    summary_data.get("pain_decreasing_activities", ""),
-                    summary_data.get("dizziness_increasing_activities", ""),
-                    summary_data.get("dizziness_decreasing_activities", ""),
+                    self.db._pack_text(summary_data.get("sleep_note", "")),
+                    self.db._pack_text(summary_data.get("daily_activity_note", "")),
+                    self.db._pack_text(summary_data.get("pain_increasing_activities", "")),
+                    self.db._pack_text(summary_data.get("pain_decreasing_activities", "")),
+                    self.db._pack_text(summary_data.get("dizziness_increasing_activities", "")),
+                    self.db._pack_text(summary_data.get("dizziness_decreasing_activities", "")),
                     int(summary_data.get("medication_used", False)),
-                    summary_data.get("medication_note", ""),
+                    self.db._pack_text(summary_data.get("medication_note", "")),
                     notes_json,
                     triggers_json,
                     interventions_json,
@@ -130,61 +382,151 @@ class RecordCRUD:
                     summary_data.get("throat_level", 0),
                     summary_data.get("dry_eye_level", 0),
                     summary_data.get("fatigue_level", 0),
-                    summary_data.get("sleep_note", ""),
-                    summary_data.get("daily_activity_note", ""),
-                    summary_data.get("pain_increasing_activities", ""),
-                    summary_data.get("pain_decreasing_activities", ""),
-                    summary_data.get("dizziness_increasing_activities", ""),
-                    summary_data.get("dizziness_decreasing_activities", ""),
+                    self.db._pack_text(summary_data.get("sleep_note", "")),
+                    self.db._pack_text(summary_data.get("daily_activity_note", "")),
+                    self.db._pack_text(summary_data.get("pain_increasing_activities", "")),
+                    self.db._pack_text(summary_data.get("pain_decreasing_activities", "")),
+                    self.db._pack_text(summary_data.get("dizziness_increasing_activities", "")),
+                    self.db._pack_text(summary_data.get("dizziness_decreasing_activities", "")),
                     int(summary_data.get("medication_used", False)),
-                    summary_data.get("medication_note", ""),
+                    self.db._pack_text(summary_data.get("medication_note", "")),
                     notes_json,
                     triggers_json,
                     interventions_json
                 )
             )
 
+        if self.db.fts_enabled:
+            search_index.index_summary(cursor, summary_data["date"], summary_data)
+
         conn.commit()
         conn.close()
 
-    def get_summary(self, date: str):
+    def _summary_from_row(self, columns, row, raw_json: bool = False) -> dict:
+        summary = dict(zip(columns, row))
+        for col in JSON_COLUMNS["daily_summaries"]:
+            if col in summary:
+                summary[col] = self._json_value(summary[col], raw_json)
+        if "medication_used" in summary:
+            summary["medication_used"] = bool(summary["medication_used"])
+        return summary
+
+    def get_summary(self, date: str, fields=SUMMARY_COLUMNS, raw_json: bool = False):
+        select_list = ", ".join(self._summary_select_list(fields))
         conn = self.db.get_connection()
+        summaries = self.db.archive.sources(conn, date, date)["daily_summaries"]
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM daily_summaries WHERE date = ?", (date,))
+        cursor.execute(f"SELECT {select_list} FROM {summaries} WHERE date = ?", (date,))
         row = cursor.fetchone()
-        columns = [description[0] for description in cursor.description]
         conn.close()
 
         if not row:
             return None
+        return self._summary_from_row(fields, row, raw_json)
 
-        summary = dict(zip(columns, row))
-        summary["notes"] = self.db._parse_json(summary.get("notes"))
-        summary["triggers"] = self.db._parse_json(summary.get("triggers"))
-        summary["interventions"] = self.db._parse_json(summary.get("interventions"))
-        return summary
+    def _summary_select_list(self, fields):
+        compressed = text_codec.COMPRESSED_TEXT_COLUMNS["daily_summaries"]
+        return [
+            f"COALESCE({text_codec.sql(col) if col in compressed else col}, "
+            f"{_sql_literal(SUMMARY_FIELD_DEFAULTS[col])}) AS {col}"
+            if col in SUMMARY_FIELD_DEFAULTS else col
+            for col in fields
+        ]
 
-    def get_summaries_for_dates(self, dates: list[str]) -> dict:
-        if not dates:
-            return {}
-        conn = self.db.get_connection()
+    def get_summaries_in_range(self, start_date: str, end_date: str, raw_json: bool = False, conn=None) -> dict:
+        start, end = sorted((start_date, end_date))
+        own_conn = conn is None
+        if own_conn:
+            conn = self.db.get_connection()
+        summaries = self.db.archive.sources(conn, start, end)["daily_summaries"]
         cursor = conn.cursor()
-        placeholders = ",".join(["?"] * len(dates))
-        cursor.execute(f"SELECT * FROM daily_summaries WHERE date IN ({placeholders})", dates)
+        cursor.execute(
+            f"SELECT {SUMMARY_TABLE_SELECT} FROM {summaries} WHERE date >= ? AND date <= ? ORDER BY date ASC",
+            (start, end)
+        )
         rows = cursor.fetchall()
         columns = [description[0] for description in cursor.description]
+        if own_conn:
+            conn.close()
+        return {row[0]: self._summary_from_row(columns, row, raw_json) for row in rows}
+
+    def list_summaries(
+        self,
+        start_date: str,
+        end_date: str,
+        fields=SUMMARY_COLUMNS,
+        limit: int = None,
+        offset: int = 0,
+        raw_json: bool = False
+    ):
+        """(total, summaries) for a date range, reading only the projected columns.
+
+        ``fields`` must come from SUMMARY_COLUMNS (see parse_fields); defaults
+        are applied in SQL like the record read path.
+        """
+        start, end = sorted((start_date, end_date))
+        select_list = ", ".join(self._summary_select_list(fields))
+        conn = self.db.get_connection()
+        summaries = self.db.archive.sources(conn, start, end)["daily_summaries"]
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT count(*) FROM {summaries} WHERE date >= ? AND date <= ?", (start, end)
+        )
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f"""
+            SELECT {select_list} FROM {summaries}
+            WHERE date >= ? AND date <= ?
+            ORDER BY date ASC
+            LIMIT ? OFFSET ?
+            """,
+            (start, end, -1 if limit is None else limit, offset)
+        )
+        rows = cursor.fetchall()
         conn.close()
+        return total, [self._summary_from_row(fields, row, raw_json) for row in rows]
+
+    def iter_summaries(
+        self, start_date: str = None, end_date: str = None, fields=SUMMARY_COLUMNS, raw_json: bool = True
+    ):
+        """Yield summaries in date order straight from the cursor (see iter_records)."""
+        select_list = ", ".join(self._summary_select_list(fields))
+        where, params = _date_filter("date", start_date, end_date)
+        conn = self.db.get_connection(check_same_thread=False)
+        try:
+            summaries = self.db.archive.sources(conn, start_date, end_date)["daily_summaries"]
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT {select_list} FROM {summaries} WHERE {where} ORDER BY date ASC", params)
+            for row in cursor:
+                yield self._summary_from_row(fields, row, raw_json)
+        finally:
+            conn.close()
+
+    def get_summaries_for_dates(self, dates: list[str], raw_json: bool = False) -> dict:
+        """Look up summaries for an arbitrary set of dates.
 
+        Prefer get_summaries_in_range for contiguous dates; this issues one
+        bounded IN (...) query per SUMMARY_LOOKUP_CHUNK dates.
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return {}
+        conn = self.db.get_connection()
+        summaries = self.db.archive.sources(conn, dates[0], dates[-1])["daily_summaries"]
+        cursor = conn.cursor()
         result = {}
-        for row in rows:
-            summary = dict(zip(columns, row))
-            summary["notes"] = self.db._parse_json(summary.get("notes"))
-            summary["triggers"] = self.db._parse_json(summary.get("triggers"))
-            summary["interventions"] = self.db._parse_json(summary.get("interventions"))
-            result[summary["date"]] = summary
+        for i in range(0, len(dates), SUMMARY_LOOKUP_CHUNK):
+            chunk = dates[i:i + SUMMARY_LOOKUP_CHUNK]
+            placeholders = ",".join(["?"] * len(chunk))
+            cursor.execute(f"SELECT {SUMMARY_TABLE_SELECT} FROM {summaries} WHERE date IN ({placeholders})", chunk)
+            columns = [description[0] for description in cursor.description]
+            for row in cursor.fetchall():
+                result[row[0]] = self._summary_from_row(columns, row, raw_json)
+        conn.close()
         return result
 
     def add_record(self, record_data: dict):
+        self.db.archive.thaw(record_data["date"])
         conn = self.db.get_connection()
         cursor = conn.cursor()
 
@@ -213,6 +555,8 @@ class RecordCRUD:
         existing_id = self._get_existing_record_id(cursor, record_data["date"], time_of_day)
 
         if existing_id:
+            if self.db.fts_enabled:
+                search_index.unindex_record(cursor, existing_id)
             cursor.execute(
                 """
                 UPDATE daily_records SET
@@ -228,7 +572,7 @@ class RecordCRUD:
                     record_data.get("pain_level", 0),
                     record_data.get("dizziness_level", 0),
                     record_data.get("mood_level", 0),
-                    record_data.get("body_feeling_note", ""),
+                    self.db._pack_text(record_data.get("body_feeling_note", "")),
                     existing_id
                 )
             )
@@ -246,124 +590,73 @@ class RecordCRUD:
                     record_data.get("pain_level", 0),
                     record_data.get("dizziness_level", 0),
                     record_data.get("mood_level", 0),
-                    record_data.get("body_feeling_note", "")
+                    self.db._pack_text(record_data.get("body_feeling_note", ""))
                 )
             )
             record_id = cursor.lastrowid
-        
+
+        if self.db.fts_enabled:
+            search_index.index_record(cursor, record_id, record_data["date"], time_of_day, record_data)
+
         conn.commit()
         conn.close()
         return record_id
 
-    def get_record(self, date, time_of_day):
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        normalized_time = self._normalize_time_of_day(time_of_day)
-        row = None
-        for candidate in self._time_of_day_aliases(normalized_time):
-            cursor.execute("SELECT * FROM daily_records WHERE date = ? AND time_of_day = ?", (date, candidate))
-            row = cursor.fetchone()
-            if row:
-                break
-        if row:
-            columns = [description[0] for description in cursor.description]
-            record = dict(zip(columns, row))
-            record["time_of_day"] = self._normalize_time_of_day(record.get("time_of_day"))
-            record["notes"] = self.db._parse_json(record.get("notes"))
-            record["triggers"] = self.db._parse_json(record.get("triggers"))
-            record["interventions"] = self.db._parse_json(record.get("interventions"))
-            if not record.get("body_feeling_note") and record.get("notes", {}).get("General"):
-                record["body_feeling_note"] = record["notes"].get("General")
-
-            summary = self.get_summary(date)
-            if summary:
-                for k, v in summary.items():
-                    if k not in {"date", "created_at"}:
-                        record[k] = v
-
-            for k, v in self._record_defaults.items():
-                if record.get(k) is None:
-                    record[k] = v
+    def get_record(self, date, time_of_day, fields=RECORD_COLUMNS, raw_json: bool = False):
+        aliases = self._time_of_day_aliases(time_of_day)
+        placeholders = ",".join(["?"] * len(aliases))
+        # Prefer the canonical slot name over legacy aliases
+        records = self._select_records(
+            f"r.date = ? AND r.time_of_day IN ({placeholders})",
+            (date, *aliases, aliases[0]),
+            "r.time_of_day = ? DESC, r.id ASC LIMIT 1",
+            raw_json,
+            fields=fields,
+            span=(date, date)
+        )
+        return records[0] if records else None
 
-            conn.close()
-            return record
-        conn.close()
-        return None
+    def get_all_records(self, raw_json: bool = False, fields=RECORD_COLUMNS):
+        return self._select_records("1", (), "r.date DESC, r.created_at DESC, r.id DESC", raw_json, fields=fields)
 
-    def get_all_records(self):
-        conn = self.db.get_connection()
-        # Using pandas here as in original, or convert to dict list
-        # Returning list of dicts is better for API
-        cursor = conn.cursor()
-        cursor.execute("SELECT * FROM daily_records ORDER BY date DESC, created_at DESC")
-        rows = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
-        conn.close()
-        
-        results = []
-        for row in rows:
-            record = dict(zip(columns, row))
-            record["time_of_day"] = self._normalize_time_of_day(record.get("time_of_day"))
-            record["notes"] = self.db._parse_json(record.get("notes"))
-            record["triggers"] = self.db._parse_json(record.get("triggers"))
-            record["interventions"] = self.db._parse_json(record.get("interventions"))
-            if not record.get("body_feeling_note") and record.get("notes", {}).get("General"):
-                record["body_feeling_note"] = record["notes"].get("General")
-            results.append(record)
-        
-        summaries = self.get_summaries_for_dates(list({r["date"] for r in results if r.get("date")}))
-        for record in results:
-            summary = summaries.get(record.get("date"))
-            if summary:
-                for k, v in summary.items():
-                    if k not in {"date", "created_at"}:
-                        record[k] = v
-            for k, v in self._record_defaults.items():
-                if record.get(k) is None:
-                    record[k] = v
-        return results
-
-    def get_records_in_range(self, start_date: str, end_date: str):
+    def get_records_in_range(
+        self, start_date: str, end_date: str, raw_json: bool = False, conn=None, fields=RECORD_COLUMNS
+    ):
         start = start_date if start_date <= end_date else end_date
         end = end_date if start_date <= end_date else start_date
-
-        conn = self.db.get_connection()
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT * FROM daily_records WHERE date >= ? AND date <= ? ORDER BY date ASC, created_at ASC",
+        return self._select_records(
+            "r.date >= ? AND r.date <= ?",
+            (start, end),
+            "r.date ASC, r.created_at ASC, r.id ASC",
+            raw_json,
+            conn,
+            fields,
             (start, end)
         )
-        rows = cursor.fetchall()
-        columns = [description[0] for description in cursor.description]
-        conn.close()
 
-        results = []
-        for row in rows:
-            record = dict(zip(columns, row))
-            record["time_of_day"] = self._normalize_time_of_day(record.get("time_of_day"))
-            record["notes"] = self.db._parse_json(record.get("notes"))
-            record["triggers"] = self.db._parse_json(record.get("triggers"))
-            record["interventions"] = self.db._parse_json(record.get("interventions"))
-            if not record.get("body_feeling_note") and record.get("notes", {}).get("General"):
-                record["body_feeling_note"] = record["notes"].get("General")
-            results.append(record)
-
-        summaries = self.get_summaries_for_dates(list({r["date"] for r in results if r.get("date")}))
-        for record in results:
-            summary = summaries.get(record.get("date"))
-            if summary:
-                for k, v in summary.items():
-                    if k not in {"date", "created_at"}:
-                        record[k] = v
-            for k, v in self._record_defaults.items():
-                if record.get(k) is None:
-                    record[k] = v
-
-        return results
+    def iter_records(
+        self, start_date: str = None, end_date: str = None, fields=RECORD_COLUMNS, raw_json: bool = True
+    ):
+        """Yield records in date order straight from the cursor, for exports of any size."""
+        where, params = _date_filter("r.date", start_date, end_date)
+        conn = self.db.get_connection(check_same_thread=False)
+        try:
+            sources = self.db.archive.sources(conn, start_date, end_date)
+            cursor = conn.cursor()
+            cursor.row_factory = self._record_row_factory(raw_json, fields)
+            cursor.execute(
+                f"{record_select(fields, sources)}\nWHERE {where}\nORDER BY r.date ASC, r.created_at ASC, r.id ASC", params
+            )
+            yield from cursor
+        finally:
+            conn.close()
 
     def delete_record(self, record_id):
+        self.db.archive.thaw_record(record_id)
         conn = self.db.get_connection()
         cursor = conn.cursor()
+        if self.db.fts_enabled:
+            search_index.unindex_record(cursor, record_id)
         cursor.execute("DELETE FROM daily_records WHERE id = ?", (record_id,))
         conn.commit()
         conn.close()
@@ -393,34 +686,505 @@ class ExerciseCRUD:
 
     def get_exercise_log(self, date_str):
         conn = self.db.get_connection()
+        logs = self.db.archive.sources(conn, date_str, date_str)["exercise_logs"]
         cursor = conn.cursor()
-        cursor.execute('SELECT data FROM exercise_logs WHERE date = ?', (date_str,))
+        cursor.execute(f"SELECT {text_codec.sql('data')} FROM {logs} WHERE date = ?", (date_str,))
         result = cursor.fetchone()
         conn.close()
         return self.db._parse_json(result[0]) if result else None
 
     def save_exercise_log(self, date_str, data):
+        self.db.archive.thaw(date_str)
         conn = self.db.get_connection()
         cursor = conn.cursor()
-        data_json = self.db._ensure_json(data)
+        data_json = self.db._pack_text(self.db._ensure_json(data))
+        if self.db.fts_enabled:
+            search_index.unindex_exercise_log(cursor, date_str)
         cursor.execute('''
             INSERT OR REPLACE INTO exercise_logs (date, data, created_at)
             VALUES (?, ?, CURRENT_TIMESTAMP)
         ''', (date_str, data_json))
+        exercise_completions.index_log(cursor, date_str, data)
+        if self.db.fts_enabled:
+            search_index.index_exercise_log(cursor, date_str, data)
         conn.commit()
         conn.close()
 
-    def get_all_exercise_logs(self):
+    def get_all_exercise_logs(self, raw_json: bool = False):
         conn = self.db.get_connection()
+        logs = self.db.archive.sources(conn)["exercise_logs"]
         cursor = conn.cursor()
-        cursor.execute('SELECT date, data FROM exercise_logs ORDER BY date DESC')
+        cursor.execute(f"SELECT date, {text_codec.sql('data')}, created_at FROM {logs} ORDER BY date DESC")
         results = cursor.fetchall()
         conn.close()
+        decode = self.db._raw_json if raw_json else self.db._parse_json
+        return [{'date': r[0], 'data': decode(r[1]), 'created_at': r[2]} for r in results]
+
+    def get_exercise_logs_in_range(self, start_date: str, end_date: str, conn=None):
+        start, end = sorted((start_date, end_date))
+        own_conn = conn is None
+        if own_conn:
+            conn = self.db.get_connection()
+        logs = self.db.archive.sources(conn, start, end)["exercise_logs"]
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT date, {text_codec.sql('data')} FROM {logs} WHERE date >= ? AND date <= ? ORDER BY date ASC",
+            (start, end)
+        )
+        results = cursor.fetchall()
+        if own_conn:
+            conn.close()
         return [{'date': r[0], 'data': self.db._parse_json(r[1])} for r in results]
 
+    def iter_exercise_logs(self, start_date: str = None, end_date: str = None, raw_json: bool = True):
+        """Yield logs in date order straight from the cursor (see RecordCRUD.iter_records)."""
+        decode = self.db._raw_json if raw_json else self.db._parse_json
+        where, params = _date_filter("date", start_date, end_date)
+        conn = self.db.get_connection(check_same_thread=False)
+        try:
+            logs = self.db.archive.sources(conn, start_date, end_date)["exercise_logs"]
+            cursor = conn.cursor()
+            cursor.execute(
+                f"SELECT date, {text_codec.sql('data')}, created_at FROM {logs} WHERE {where} ORDER BY date ASC",
+                params
+            )
+            for date, data, created_at in cursor:
+                yield {"date": date, "data": decode(data), "created_at": created_at}
+        finally:
+            conn.close()
+
+    def get_exercise_stats(self, as_of: str):
+        """Streaks and 7/30/90-day completion rates per exercise id, as of a date.
+
+        A streak counts consecutive days logged as fully completed; the current
+        streak may end today or yesterday (today not logged yet).
+        """
+        streaks = {row[0]: row[1:] for row in _iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"""
+            WITH done AS (
+                SELECT
+                    exercise_id,
+                    date,
+                    {_day_number('date', dialect)} - ROW_NUMBER() OVER (PARTITION BY exercise_id ORDER BY date) AS island
+                FROM exercise_completions
+                WHERE score >= 1 AND date <= ?
+            ),
+            streaks AS (
+                SELECT exercise_id, COUNT(*) AS days, MAX(date) AS last_date
+                FROM done
+                GROUP BY exercise_id, island
+            )
+            SELECT
+                exercise_id,
+                MAX(CASE WHEN last_date >= {_shift_date('?', -1, dialect)} THEN days ELSE 0 END),
+                MAX(days)
+            FROM streaks
+            GROUP BY exercise_id
+            """,
+            (as_of, as_of)
+        )}
+        rates = {row[0]: row[1:] for row in _iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"""
+            SELECT
+                exercise_id,
+                SUM(CASE WHEN date > {_shift_date('?', -7, dialect)} THEN score ELSE 0 END) / 7.0,
+                SUM(CASE WHEN date > {_shift_date('?', -30, dialect)} THEN score ELSE 0 END) / 30.0,
+                SUM(score) / 90.0
+            FROM exercise_completions
+            WHERE date > {_shift_date('?', -90, dialect)} AND date <= ?
+            GROUP BY exercise_id
+            """,
+            (as_of,) * 4
+        )}
+
+        stats = {}
+        for eid in streaks.keys() | rates.keys():
+            current, longest = streaks.get(eid, (0, 0))
+            rate_7, rate_30, rate_90 = rates.get(eid, (0.0, 0.0, 0.0))
+            stats[eid] = {
+                "current_streak": current,
+                "longest_streak": longest,
+                "completion_7d": round(rate_7, 3),
+                "completion_30d": round(rate_30, 3),
+                "completion_90d": round(rate_90, 3),
+            }
+        return stats
+
     def delete_exercise_log(self, date_str):
+        self.db.archive.thaw(date_str)
         conn = self.db.get_connection()
         cursor = conn.cursor()
+        if self.db.fts_enabled:
+            search_index.unindex_exercise_log(cursor, date_str)
         cursor.execute('DELETE FROM exercise_logs WHERE date = ?', (date_str,))
+        exercise_completions.unindex(cursor, date_str)
+        conn.commit()
+        conn.close()
+
+
+class SymptomCRUD:
+    """The symptom catalogue and per-symptom scores in long format (see symptom_scores.py)."""
+
+    def __init__(self, db_manager: DBManager):
+        self.db = db_manager
+
+    def _symptom_from_row(self, row) -> dict:
+        sid, label, scope, column_name, sort_order, enabled = row
+        return {
+            "id": sid,
+            "label": label,
+            "scope": scope,
+            "order": sort_order,
+            "enabled": bool(enabled),
+            "builtin": column_name is not None,
+        }
+
+    def get_catalogue(self) -> list[dict]:
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, label, scope, column_name, sort_order, enabled FROM symptom_catalogue ORDER BY sort_order, id"
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return [self._symptom_from_row(row) for row in rows]
+
+    def get_symptom(self, symptom_id: str):
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT id, label, scope, column_name, sort_order, enabled FROM symptom_catalogue WHERE id = ?",
+            (symptom_id,)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        return self._symptom_from_row(row) if row else None
+
+    def save_symptom(self, item: dict) -> dict:
+        """Add or update a symptom. A built-in symptom's scope is fixed to its column."""
+        existing = self.get_symptom(item["id"])
+        if existing and existing["builtin"] and item["scope"] != existing["scope"]:
+            raise ValueError(f"Scope of built-in symptom {item['id']} cannot change")
+        if existing and not existing["builtin"] and item["scope"] != existing["scope"]:
+            raise ValueError("Delete the symptom to change its scope")
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            INSERT INTO symptom_catalogue (id, label, scope, sort_order, enabled)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                label = excluded.label,
+                sort_order = excluded.sort_order,
+                enabled = excluded.enabled
+            """,
+            (item["id"], item["label"], item["scope"], item.get("order", 99), int(item.get("enabled", True)))
+        )
+        conn.commit()
+        conn.close()
+        return self.get_symptom(item["id"])
+
+    def delete_symptom(self, symptom_id: str):
+        """Remove a custom symptom and its scores; built-in symptoms can only be disabled."""
+        existing = self.get_symptom(symptom_id)
+        if existing is None:
+            return False
+        if existing["builtin"]:
+            raise ValueError(f"Built-in symptom {symptom_id} cannot be deleted; disable it instead")
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM symptom_scores WHERE symptom_id = ?", (symptom_id,))
+        cursor.execute("DELETE FROM symptom_catalogue WHERE id = ?", (symptom_id,))
+        conn.commit()
+        conn.close()
+        return True
+
+    def get_scores(self, symptom_id: str, start_date: str, end_date: str) -> list[tuple]:
+        """(date, slot, level) for one symptom, oldest first; a range scan of the primary key."""
+        start, end = sorted((_check_date(start_date), _check_date(end_date)))
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(
+            """
+            SELECT date, slot, level FROM symptom_scores
+            WHERE symptom_id = ? AND date >= ? AND date <= ?
+            ORDER BY date, slot
+            """,
+            (symptom_id, start, end)
+        )
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def save_scores(self, symptom: dict, scores: list[dict]):
+        """Upsert a custom symptom's scores; a level of None removes the score.
+
+        Built-in symptoms are written through their record/summary columns.
+        """
+        if symptom["builtin"]:
+            raise ValueError(
+                f"Scores of built-in symptom {symptom['id']} are written through records and daily summaries"
+            )
+        rows = []
+        for score in scores:
+            if symptom["scope"] == "day":
+                slot = DAY_SLOT
+            else:
+                slot = score.get("slot") or ""
+                slot = _CANONICAL_SLOTS.get(slot, slot)
+                if slot not in TIME_SLOTS:
+                    raise ValueError(f"slot must be one of {', '.join(TIME_SLOTS)}")
+            rows.append((symptom["id"], _check_date(score["date"]), slot, score.get("level")))
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.executemany(
+            "DELETE FROM symptom_scores WHERE symptom_id = ? AND date = ? AND slot = ?",
+            [row[:3] for row in rows if row[3] is None]
+        )
+        cursor.executemany(
+            "INSERT OR REPLACE INTO symptom_scores (symptom_id, date, slot, level) VALUES (?, ?, ?, ?)",
+            [row for row in rows if row[3] is not None]
+        )
         conn.commit()
         conn.close()
+
+
+class DayCRUD:
+    """Everything recorded for a day (all slots, summary, exercise log) read over one connection."""
+
+    def __init__(self, db_manager: DBManager):
+        self.db = db_manager
+        self.records = RecordCRUD(db_manager)
+        self.exercises = ExerciseCRUD(db_manager)
+
+    def get_days_in_range(self, start_date: str, end_date: str) -> list[dict]:
+        """One bundle per date, oldest first: {date, records: {slot: record}, summary, exercise_log}.
+
+        Three indexed range queries on a single connection; dates without any
+        data are skipped.
+        """
+        start, end = sorted((start_date, end_date))
+        conn = self.db.get_connection()
+        try:
+            records = self.records.get_records_in_range(start, end, conn=conn)
+            summaries = self.records.get_summaries_in_range(start, end, conn=conn)
+            logs = self.exercises.get_exercise_logs_in_range(start, end, conn=conn)
+        finally:
+            conn.close()
+
+        days = {}
+
+        def day(date):
+            if date not in days:
+                days[date] = {"date": date, "records": {}, "summary": None, "exercise_log": None}
+            return days[date]
+
+        for record in records:
+            # First record per slot wins, matching the Excel export
+            day(record["date"])["records"].setdefault(record["time_of_day"], record)
+        for date, summary in summaries.items():
+            day(date)["summary"] = summary
+        for log in logs:
+            day(log["date"])["exercise_log"] = log["data"]
+        return [days[date] for date in sorted(days)]
+
+    def get_day(self, date: str) -> dict:
+        days = self.get_days_in_range(date, date)
+        return days[0] if days else {"date": date, "records": {}, "summary": None, "exercise_log": None}
+
+class AnalyticsCRUD:
+    """Read-only queries feeding the analytics services."""
+
+    def __init__(self, db_manager: DBManager):
+        self.db = db_manager
+
+    def get_daily_symptom_activities(self, symptom: str, start_date: str = None, end_date: str = None):
+        """Per-day mean {symptom}_level with that symptom's increasing/decreasing activity text.
+
+        Returns a list of (date, mean_level, increasing_text, decreasing_text), oldest first.
+        """
+        def text(ref, column, dialect):
+            # health_text() only exists on SQLite connections, so compressed text keeps this query there
+            return text_codec.sql(f"{ref}.{column}") if dialect == "sqlite" else f"{ref}.{column}"
+
+        increasing = f"{symptom}_increasing_activities"
+        decreasing = f"{symptom}_decreasing_activities"
+        where, params = _date_filter("r.date", start_date, end_date)
+        # At most one summary per date, so MAX(s.x) is s.x (and valid in DuckDB's GROUP BY)
+        return list(_iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"""
+            SELECT
+                r.date,
+                AVG(COALESCE(r.{symptom}_level, 0)),
+                COALESCE(MAX({text('s', increasing, dialect)}), MAX({text('r', increasing, dialect)}), ''),
+                COALESCE(MAX({text('s', decreasing, dialect)}), MAX({text('r', decreasing, dialect)}), '')
+            FROM {sources['daily_records']} r
+            LEFT JOIN {sources['daily_summaries']} s ON s.date = r.date
+            WHERE {where}
+            GROUP BY r.date
+            ORDER BY r.date ASC
+            """,
+            params,
+            start_date,
+            end_date,
+            use_engine=self.db.compress_text_min_bytes is None
+        ))
+
+    def read_snapshot_delta(self, full: bool):
+        """Rows for the columnar snapshot, read in one transaction with the dirty-date marks.
+
+        Returns (data_version, snapshot_mark, last_dirty_id, dirty_dates, rows).
+        The mark names the materialisation the dirty dates are relative to.
+        Rows are (date ordinal, slot index, *SNAPSHOT_LEVEL_COLUMNS) for every
+        record when ``full`` is set, else only for the dirty dates, in record id
+        order; unknown slots and NULL levels are -1.
+        """
+        conn = self.db.get_connection()
+        sources = self.db.archive.sources(conn)
+        select = SNAPSHOT_SELECT if sources is HOT_SOURCES else _build_snapshot_select(sources)
+        cursor = conn.cursor()
+        cursor.execute("BEGIN")
+        cursor.execute(
+            "SELECT key, value FROM app_meta WHERE key IN ('data_version', 'snapshot_mark', 'snapshot_dirty_id')"
+        )
+        meta = dict(cursor.fetchall())
+        cursor.execute("SELECT MAX(id) FROM snapshot_dirty")
+        # Ids only grow (AUTOINCREMENT); with no marks left the committed snapshot's id still holds
+        last_id = cursor.fetchone()[0] or int(meta.get("snapshot_dirty_id", 0))
+        cursor.execute("SELECT DISTINCT date FROM snapshot_dirty WHERE id <= ?", (last_id,))
+        dirty = [row[0] for row in cursor.fetchall() if row[0]]
+        where = "1" if full else "r.date IN (SELECT date FROM snapshot_dirty WHERE id <= ?)"
+        cursor.execute(
+            f"{select}\nWHERE julianday(r.date) IS NOT NULL AND {where}\nORDER BY r.id", () if full else (last_id,)
+        )
+        rows = cursor.fetchall()
+        conn.commit()
+        conn.close()
+        return int(meta.get("data_version", 0)), meta.get("snapshot_mark"), last_id, dirty, rows
+
+    def commit_snapshot(self, mark: str, last_id: int, mark_exists=lambda mark: True) -> bool:
+        """Record a materialised snapshot and drop the dirty marks it covers.
+
+        Returns False (changing nothing) unless the snapshot covers later
+        marks than the committed one, or the same marks while the committed
+        one is gone (``mark_exists``), and ``mark`` itself still exists.
+        """
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        cursor.execute("SELECT key, value FROM app_meta WHERE key IN ('snapshot_mark', 'snapshot_dirty_id')")
+        meta = dict(cursor.fetchall())
+        committed_id = int(meta.get("snapshot_dirty_id", -1))
+        newer = last_id > committed_id or (
+            last_id == committed_id and not (meta.get("snapshot_mark") and mark_exists(meta["snapshot_mark"]))
+        )
+        if not newer or not mark_exists(mark):
+            conn.rollback()
+            conn.close()
+            return False
+        cursor.execute("DELETE FROM snapshot_dirty WHERE id <= ?", (last_id,))
+        cursor.executemany(
+            "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)",
+            (("snapshot_mark", mark), ("snapshot_dirty_id", last_id))
+        )
+        conn.commit()
+        conn.close()
+        return True
+
+    def get_date_span(self):
+        """(first, last) date with any record, summary or exercise log; (None, None) if empty."""
+        conn = self.db.get_connection()
+        sources = self.db.archive.sources(conn)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT MIN(date), MAX(date) FROM ("
+            + " UNION ALL ".join(
+                f"SELECT MIN(date) AS date FROM {source} UNION ALL SELECT MAX(date) FROM {source}"
+                for source in sources.values()
+            )
+            + ")"
+        )
+        first, last = cursor.fetchone()
+        conn.close()
+        return first, last
+
+    def get_calendar(self, start_date: str, end_date: str) -> list[str]:
+        """Every date from start_date to end_date inclusive, generated in SQL."""
+        conn = self.db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"WITH RECURSIVE {calendar_cte()} SELECT date FROM calendar", (start_date, end_date))
+        dates = [row[0] for row in cursor.fetchall()]
+        conn.close()
+        return dates
+
+    def get_missing_slots(self, start_date: str, end_date: str, limit: int, offset: int = 0):
+        """(total, [(date, time_of_day), ...]) of slots with no record, via an anti-join."""
+        def missing(sources, dialect):
+            return f"""
+            WITH RECURSIVE {calendar_cte(dialect=dialect)},
+            slots(time_of_day, alias) AS ({_SLOT_VALUES}),
+            missing AS (
+                SELECT c.date, s.time_of_day
+                FROM calendar c CROSS JOIN slots s
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {sources['daily_records']} r
+                    WHERE r.date = c.date AND r.time_of_day IN (s.time_of_day, s.alias)
+                )
+            )
+            """
+
+        (total,), = _iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"{missing(sources, dialect)} SELECT count(*) FROM missing",
+            (start_date, end_date),
+            start_date,
+            end_date
+        )
+        rows = list(_iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"""{missing(sources, dialect)}
+            SELECT date, time_of_day FROM missing
+            ORDER BY date, CASE time_of_day WHEN '起床' THEN 0 WHEN '上午' THEN 1 WHEN '下午' THEN 2 ELSE 3 END
+            LIMIT ? OFFSET ?
+            """,
+            (start_date, end_date, limit, offset),
+            start_date,
+            end_date
+        ))
+        return total, rows
+
+    def get_coverage(self, start_date: str, end_date: str, period: str):
+        """Per-period (period, days, recorded_slots, days_with_summary), gap-filled over the calendar."""
+        fmt = PERIOD_FORMATS[period]
+        return list(_iter_aggregate(
+            self.db,
+            lambda sources, dialect: f"""
+            WITH RECURSIVE {calendar_cte(dialect=dialect)},
+            slots(time_of_day, alias) AS ({_SLOT_VALUES}),
+            present AS (
+                SELECT
+                    c.date,
+                    SUM(CASE WHEN EXISTS (
+                        SELECT 1 FROM {sources['daily_records']} r
+                        WHERE r.date = c.date AND r.time_of_day IN (s.time_of_day, s.alias)
+                    ) THEN 1 ELSE 0 END) AS recorded
+                FROM calendar c CROSS JOIN slots s
+                GROUP BY c.date
+            )
+            SELECT
+                {_format_date(fmt, 'p.date', dialect)} AS period,
+                COUNT(*),
+                SUM(p.recorded),
+                SUM(CASE WHEN d.date IS NULL THEN 0 ELSE 1 END)
+            FROM present p
+            LEFT JOIN {sources['daily_summaries']} d ON d.date = p.date
+            GROUP BY period
+            ORDER BY period
+            """,
+            (start_date, end_date),
+            start_date,
+            end_date
+        ))
@@ -1,19 +1,94 @@
 import sqlite3
 import json
+import logging
+from datetime import datetime, timedelta
+
+from . import exercise_completions, json_entries, search_index, symptom_scores, text_codec
+from .archive import ArchiveStore
+from .backends import SQLiteFileBackend, create_analytics_engine, create_backend
 
 DB_PATH = "health_records.db"
 
+# Columns holding per-symptom JSON dicts; legacy rows may contain plain text.
+JSON_COLUMNS = {
+    "daily_records": ("notes", "triggers", "interventions"),
+    "daily_summaries": ("notes", "triggers", "interventions"),
+}
+
+# Columns repair_legacy_json rewrites into canonical JSON: JSON_COLUMNS and the exercise log payload.
+REPAIRED_JSON_COLUMNS = {**JSON_COLUMNS, "exercise_logs": ("data",)}
+
+# app_meta key set once repair_legacy_json has covered every REPAIRED_JSON_COLUMNS column.
+JSON_REPAIR_KEY = "json_repair_v2"
+
+# app_meta key set once symptom_scores is derived by the current triggers.
+SYMPTOM_SCORES_KEY = "symptom_scores_v2"
+
+# Tables whose writes bump app_meta.data_version.
+VERSIONED_TABLES = (
+    "daily_records", "daily_summaries", "exercise_logs", "exercise_config", "symptom_catalogue", "symptom_scores"
+)
+
+# Tables whose writes mark their dates for the columnar analytics snapshot.
+SNAPSHOT_TABLES = ("daily_records", "daily_summaries")
+
+# Only every Nth unparseable value is logged; the counter keeps the full tally.
+JSON_PARSE_LOG_EVERY = 100
+
+logger = logging.getLogger(__name__)
+
+
+def calendar_cte(name: str = "calendar", dialect: str = "sqlite") -> str:
+    """Recursive CTE yielding one `date` row per day; binds (start_date, end_date).
+
+    Use as the first entry of a WITH clause: f"WITH RECURSIVE {calendar_cte()} SELECT ..."
+    ``dialect="duckdb"`` renders it for the DuckDB analytics engine.
+    """
+    if dialect == "duckdb":
+        return (
+            f"{name}(date) AS ("
+            "SELECT strftime(day, '%Y-%m-%d') FROM generate_series(CAST(? AS DATE), CAST(? AS DATE), INTERVAL 1 DAY) t(day)"
+            ")"
+        )
+    return (
+        f"{name}(date) AS ("
+        "SELECT date(?) "
+        f"UNION ALL SELECT date(date, '+1 day') FROM {name} WHERE date < date(?)"
+        ")"
+    )
+
 class DBManager:
-    def __init__(self, db_path=DB_PATH):
-        self.db_path = db_path
+    def __init__(self, db_path=DB_PATH, backend=None, analytics_engine=None, compress_text_min_bytes=None):
+        self.backend = backend or SQLiteFileBackend(db_path)
+        # None for backends without a database file (memory)
+        self.db_path = self.backend.path
+        # Optional DuckDB engine for AnalyticsCRUD aggregates (see backends.py)
+        self.analytics_engine = analytics_engine
+        # Free text of at least this many bytes is stored compressed; None disables (see text_codec.py)
+        self.compress_text_min_bytes = compress_text_min_bytes
+        # Per-year cold storage of old rows (see archive.py)
+        self.archive = ArchiveStore(self)
+        self.json_parse_failures = 0
+        # Set once every stored JSON value is canonical; until then raw reads are validated
+        self.json_repaired = False
+        self.fts_enabled = False
         self.init_db()
 
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def get_connection(self, check_same_thread: bool = True):
+        # Streaming responses advance their cursor from Starlette's thread pool;
+        # such connections are still only used by one thread at a time.
+        conn = self.backend.connect(check_same_thread)
+        conn.create_function(text_codec.SQL_FUNCTION, 1, text_codec.decode, deterministic=True)
+        return conn
 
     def init_db(self):
         conn = self.get_connection()
         cursor = conn.cursor()
+        if self.db_path:
+            # Applies to new files only; maintenance.py converts older ones once
+            cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # Readers (online backups included) never block writers; persists in the file
+            cursor.execute("PRAGMA journal_mode=WAL")
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS daily_records (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -107,6 +182,11 @@ class DBManager:
             if col not in existing_summary_columns:
                 cursor.execute(f"ALTER TABLE daily_summaries ADD COLUMN {col} {col_def}")
         
+        # Range scans (history, exports) filter daily_records by date
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_daily_records_date_slot ON daily_records (date, time_of_day)"
+        )
+
         # Exercise Configuration Table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS exercise_config (
@@ -123,15 +203,254 @@ class DBManager:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         ''')
+
+        # Internal key/value state (one-off migrations etc.)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS app_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        # Symptom catalogue and the long-format scores mirrored from the wide columns
+        cursor.execute("SELECT 1 FROM app_meta WHERE key = ?", (SYMPTOM_SCORES_KEY,))
+        scores_current = cursor.fetchone() is not None
+        if not scores_current:
+            # Missing, or mirrored by the earlier triggers (summaries only, alias slots colliding)
+            symptom_scores.drop_triggers(cursor)
+        symptom_scores.create_tables(cursor)
+        if not scores_current:
+            symptom_scores.rebuild(cursor)
+
+        # Per-key rows of the notes/triggers/interventions JSON, for JSON1 queries
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'json_entries'")
+        entries_exist = cursor.fetchone() is not None
+        json_entries.create_table(cursor)
+        if not entries_exist:
+            json_entries.rebuild(cursor)
+
+        # data_version changes on every write so derived results can be cached by it
+        cursor.execute("INSERT OR IGNORE INTO app_meta (key, value) VALUES ('data_version', 0)")
+        for table in VERSIONED_TABLES:
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS bump_version_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        UPDATE app_meta SET value = value + 1 WHERE key = 'data_version';
+                    END
+                ''')
+
+        # Dates touched since the columnar snapshot was last materialised
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS snapshot_dirty (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT
+            )
+        ''')
+        for table in SNAPSHOT_TABLES:
+            for event, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+                inserts = "\n".join(f"INSERT INTO snapshot_dirty (date) VALUES ({ref}.date);" for ref in refs)
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS mark_snapshot_{table}_{event.lower()}
+                    AFTER {event} ON {table}
+                    BEGIN
+                        {inserts}
+                    END
+                ''')
+        conn.commit()
+
+        if not scores_current:
+            self.archive.insert_symptom_scores(conn)
+            cursor.execute(
+                "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, CURRENT_TIMESTAMP)", (SYMPTOM_SCORES_KEY,)
+            )
+            conn.commit()
+
+        cursor.execute("SELECT value FROM app_meta WHERE key = ?", (JSON_REPAIR_KEY,))
+        repaired = cursor.fetchone()
+        conn.close()
+
+        if repaired:
+            self.json_repaired = True
+        else:
+            self.repair_legacy_json()
+        self.init_search_index()
+        self.init_exercise_completions()
+        if self.compress_text_min_bytes is not None:
+            self.compress_text_columns()
+
+    def init_exercise_completions(self):
+        """Create the derived exercise_completions table, backfilling it on first creation."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'exercise_completions'")
+        exists = cursor.fetchone() is not None
+        exercise_completions.create_table(cursor)
+        if not exists:
+            exercise_completions.rebuild(conn, self._parse_json)
         conn.commit()
         conn.close()
 
+    def init_search_index(self):
+        """Create the full-text index, backfilling it on first creation."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'search_docs'")
+        exists = cursor.fetchone() is not None
+        try:
+            if not exists:
+                # Earlier layout kept a copy of the text in the FTS table itself
+                cursor.execute("DROP TABLE IF EXISTS search_index")
+            search_index.create_table(cursor)
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5; search stays disabled
+            logger.warning("search_index unavailable error=%s", e)
+            conn.close()
+            return
+        if not exists:
+            conn.commit()
+            # Archived years stay searchable
+            search_index.rebuild(conn, self.archive.sources(conn))
+        conn.commit()
+        conn.close()
+        self.fts_enabled = True
+
+    def get_data_version(self) -> int:
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM app_meta WHERE key = 'data_version'")
+        row = cursor.fetchone()
+        conn.close()
+        return int(row[0]) if row else 0
+
+    def claim_schedule(self, key: str, interval_hours: float) -> bool:
+        """Store the current time under app_meta ``key`` unless it already holds one within ``interval_hours``.
+
+        Workers that each run a scheduler call this before a scheduled job, so
+        only one of them takes each run.
+        """
+        conn = self.get_connection()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT value FROM app_meta WHERE key = ?", (key,)).fetchone()
+            now = datetime.now()
+            if row and datetime.fromisoformat(row[0]) > now - timedelta(hours=interval_hours):
+                conn.rollback()
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, ?)", (key, now.isoformat(timespec="seconds"))
+            )
+            conn.commit()
+            return True
+        finally:
+            conn.close()
+
+    def repair_legacy_json(self):
+        """Rewrite non-canonical JSON columns so reads never hit the fallback path.
+
+        Safe to run repeatedly; returns the number of values rewritten.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        rewritten = 0
+        for table, columns in REPAIRED_JSON_COLUMNS.items():
+            key = "id" if table == "daily_records" else "date"
+            compressed = text_codec.COMPRESSED_TEXT_COLUMNS.get(table, ())
+            cursor.execute(f"SELECT {key}, {', '.join(text_codec.sql(col) for col in columns)} FROM {table}")
+            for row in cursor.fetchall():
+                updates = {}
+                for col, value in zip(columns, row[1:]):
+                    canonical = self._canonical_json(value)
+                    if canonical is not None:
+                        updates[col] = self._pack_text(canonical) if col in compressed else canonical
+                if updates:
+                    assignments = ", ".join(f"{col} = ?" for col in updates)
+                    conn.execute(
+                        f"UPDATE {table} SET {assignments} WHERE {key} = ?",
+                        (*updates.values(), row[0])
+                    )
+                    rewritten += len(updates)
+
+        cursor.execute(
+            "INSERT OR REPLACE INTO app_meta (key, value) VALUES (?, CURRENT_TIMESTAMP)", (JSON_REPAIR_KEY,)
+        )
+        conn.commit()
+        conn.close()
+        self.json_repaired = True
+        if rewritten:
+            logger.info("json_repair rewritten=%d", rewritten)
+        return rewritten
+
+    def compress_text_columns(self):
+        """Compress stored free text that is still plain and above the size threshold.
+
+        Runs at startup when compression is enabled; rows written since are
+        compressed on write, so later runs only scan. Returns the number of
+        values rewritten. The freed pages are returned to the OS by a VACUUM.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        rewritten = 0
+        for table, columns in text_codec.COMPRESSED_TEXT_COLUMNS.items():
+            key = "id" if table == "daily_records" else "date"
+            for col in columns:
+                cursor.execute(
+                    f"SELECT {key}, {col} FROM {table} WHERE typeof({col}) = 'text' AND length(CAST({col} AS BLOB)) >= ?",
+                    (self.compress_text_min_bytes,)
+                )
+                updates = [
+                    (packed, row_key)
+                    for row_key, value in cursor.fetchall()
+                    if (packed := self._pack_text(value)) is not value
+                ]
+                conn.executemany(f"UPDATE {table} SET {col} = ? WHERE {key} = ?", updates)
+                rewritten += len(updates)
+        conn.commit()
+        conn.close()
+        if rewritten:
+            logger.info("text_compression rewritten=%d", rewritten)
+        return rewritten
+
+    def _pack_text(self, text):
+        """The value to store for a COMPRESSED_TEXT_COLUMNS column."""
+        if self.compress_text_min_bytes is None:
+            return text
+        return text_codec.encode(text, self.compress_text_min_bytes)
+
+    def _canonical_json(self, data):
+        """Return the canonical JSON for a stored value, or None if it already is."""
+        if not data:
+            return None
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", errors="replace")
+        try:
+            parsed = json.loads(data)
+        except (json.JSONDecodeError, TypeError):
+            return self._ensure_json({"General": data})
+        if isinstance(parsed, (dict, list)):
+            return None
+        return self._ensure_json({"General": parsed if isinstance(parsed, str) and parsed else data})
+
     def _ensure_json(self, data):
         """Convert dict/list to JSON string. If string, return as is."""
         if isinstance(data, (dict, list)):
             return json.dumps(data, ensure_ascii=False)
         return data
 
+    def _raw_json(self, data):
+        """Return a stored JSON column as JSON text without decoding it.
+
+        Once repair_legacy_json has made every stored value canonical, values
+        pass through untouched so responses can splice them in verbatim;
+        before that (or for anything else) they are parsed and re-encoded.
+        """
+        if not data:
+            return "{}"
+        if self.json_repaired and isinstance(data, str) and data[0] in "{[" and data[-1] in "}]":
+            return data
+        return self._ensure_json(self._parse_json(data))
+
     def _parse_json(self, data):
         """Try to parse JSON string. If fails, return as string or wrapped in dict."""
         if not data:
@@ -143,11 +462,23 @@ class DBManager:
             # If parsed but not a dict (e.g. "some string"), wrap it
             return {"General": parsed if parsed else data}
         except (json.JSONDecodeError, TypeError) as e:
-            # Fallback for legacy text data
-            print(f"Error parsing JSON: {e}, data: {data}")
+            # Fallback for legacy text data; repair_legacy_json() removes these rows
+            self.json_parse_failures += 1
+            if (self.json_parse_failures - 1) % JSON_PARSE_LOG_EVERY == 0:
+                logger.warning(
+                    "json_parse_fallback count=%d length=%d error=%s",
+                    self.json_parse_failures,
+                    len(data) if isinstance(data, (str, bytes)) else -1,
+                    e.__class__.__name__
+                )
             return {"General": data}
 
-db_manager = DBManager()
+_backend = create_backend(DB_PATH)
+db_manager = DBManager(
+    backend=_backend,
+    analytics_engine=create_analytics_engine(_backend),
+    compress_text_min_bytes=text_codec.compression_min_bytes()
+)
 
 def get_db():
     return db_manager
@@ -0,0 +1,53 @@
+"""Per-exercise, per-day completion rows derived from the exercise_logs JSON blobs.
+
+Maintained by ExerciseCRUD on every log write so adherence stats can be
+computed with indexed, windowed SQL instead of decoding every day's blob.
+"""
+from . import text_codec
+
+# How much each logged status counts as "done"; other statuses count as 0.
+EXERCISE_STATUS_SCORES = {
+    "完成": 1.0,
+    "部分完成": 0.5,
+}
+
+
+def create_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS exercise_completions (
+            exercise_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            status TEXT,
+            score REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (exercise_id, date)
+        )
+    ''')
+    # Every log write replaces one date's rows
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_exercise_completions_date ON exercise_completions (date)")
+
+
+def index_log(cursor, date: str, data):
+    cursor.execute("DELETE FROM exercise_completions WHERE date = ?", (date,))
+    if not isinstance(data, dict):
+        return
+    rows = [
+        (eid, date, info.get("status"), EXERCISE_STATUS_SCORES.get(info.get("status"), 0.0))
+        for eid, info in data.items()
+        if isinstance(info, dict)
+    ]
+    cursor.executemany(
+        "INSERT INTO exercise_completions (exercise_id, date, status, score) VALUES (?, ?, ?, ?)",
+        rows
+    )
+
+
+def unindex(cursor, date: str):
+    cursor.execute("DELETE FROM exercise_completions WHERE date = ?", (date,))
+
+
+def rebuild(conn, parse_json):
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM exercise_completions")
+    cursor.execute(f"SELECT date, {text_codec.sql('data')} FROM exercise_logs")
+    for date, data in cursor.fetchall():
+        index_log(conn.cursor(), date, parse_json(data))
@@ -0,0 +1,140 @@
+"""Per-key rows of the notes/triggers/interventions JSON dicts, queried with JSON1.
+
+The three columns hold ``{symptom: text}`` objects on daily_records and
+daily_summaries. Triggers expand every write with ``json_each`` into
+json_entries, keyed (field, key, date, ...), so "days with a dizziness
+trigger" is a primary-key range scan and "days where intervention X was
+used" scans one field's rows with ``instr`` - both without decoding a row
+in Python. Values that are not a JSON object (legacy text, see
+DBManager.repair_legacy_json) contribute no entries.
+"""
+
+JSON_ENTRY_FIELDS = ("notes", "triggers", "interventions")
+
+# record_id stored for summary entries (record ids start at 1).
+SUMMARY_ROW_ID = 0
+
+# (table, source, record id expression, time_of_day expression)
+_SOURCES = (
+    ("daily_records", "record", "{ref}.id", "{ref}.time_of_day"),
+    ("daily_summaries", "summary", str(SUMMARY_ROW_ID), "''"),
+)
+
+
+def _insert_entries(
+    source: str, ref: str, record_id: str, time_of_day: str, table: str = None, where: str = "1"
+) -> list[str]:
+    """INSERT ... SELECT over json_each per JSON field of ``ref``: NEW in a trigger, or an alias of ``table``."""
+    rows = f"{table} {ref}, " if table else ""
+    statements = []
+    for field in JSON_ENTRY_FIELDS:
+        column = f"{ref}.{field}"
+        statements.append(
+            f"INSERT OR REPLACE INTO json_entries (field, key, date, source, record_id, time_of_day, value) "
+            f"SELECT '{field}', j.key, {ref}.date, '{source}', {record_id}, {time_of_day}, CAST(j.value AS TEXT) "
+            f"FROM {rows}json_each(CASE WHEN json_valid({column}) AND json_type({column}) = 'object' "
+            f"THEN {column} ELSE '{{}}' END) j "
+            f"WHERE j.type IN ('text', 'integer', 'real') AND trim(CAST(j.value AS TEXT)) <> '' AND {where};"
+        )
+    return statements
+
+
+def create_table(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS json_entries (
+            field TEXT NOT NULL,
+            key TEXT NOT NULL,
+            date TEXT NOT NULL,
+            source TEXT NOT NULL,
+            record_id INTEGER NOT NULL,
+            time_of_day TEXT NOT NULL,
+            value TEXT NOT NULL,
+            PRIMARY KEY (field, key, date, source, record_id)
+        ) WITHOUT ROWID
+    ''')
+    # Value search across all keys of a field ("intervention X")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_json_entries_field_date ON json_entries (field, date)")
+
+    for table, source, record_id, time_of_day in _SOURCES:
+        delete_old = (
+            f"DELETE FROM json_entries WHERE source = '{source}' "
+            f"AND record_id = {record_id.format(ref='OLD')} AND date = OLD.date;"
+        )
+        insert_new = "\n".join(
+            _insert_entries(source, "NEW", record_id.format(ref="NEW"), time_of_day.format(ref="NEW"))
+        )
+        for event, body in (
+            ("INSERT", insert_new),
+            ("UPDATE", delete_old + "\n" + insert_new),
+            ("DELETE", delete_old),
+        ):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS json_entries_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    {body}
+                END
+            ''')
+
+
+def rebuild(cursor):
+    cursor.execute("DELETE FROM json_entries")
+    insert_from(cursor)
+
+
+def insert_from(cursor, schema: str = "main", where: str = "1", params: tuple = ()):
+    """Add the entries of ``schema``'s tables (e.g. an attached archive); ``where`` filters alias ``src``."""
+    for table, source, record_id, time_of_day in _SOURCES:
+        for statement in _insert_entries(
+            source, "src", record_id.format(ref="src"), time_of_day.format(ref="src"), f"{schema}.{table}", where
+        ):
+            cursor.execute(statement, params)
+
+
+def _where(field: str, key: str = None, contains: str = None, start_date: str = None, end_date: str = None):
+    clauses, params = ["field = ?"], [field]
+    if key:
+        clauses.append("key = ?")
+        params.append(key)
+    if contains:
+        clauses.append("instr(value, ?) > 0")
+        params.append(contains)
+    if start_date and end_date and end_date < start_date:
+        start_date, end_date = end_date, start_date
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    return " AND ".join(clauses), tuple(params)
+
+
+def find_entries(conn, field: str, key=None, contains=None, start_date=None, end_date=None, limit=100, offset=0):
+    """Return (total, entries) matching the filters, newest first."""
+    where, params = _where(field, key, contains, start_date, end_date)
+    cursor = conn.cursor()
+    cursor.execute(f"SELECT count(*) FROM json_entries WHERE {where}", params)
+    total = cursor.fetchone()[0]
+    cursor.execute(
+        f"""
+        SELECT date, source, time_of_day, field, key, value FROM json_entries
+        WHERE {where}
+        ORDER BY date DESC, source, time_of_day, key
+        LIMIT ? OFFSET ?
+        """,
+        (*params, limit, offset)
+    )
+    columns = ("date", "source", "time_of_day", "field", "key", "value")
+    return total, [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def find_days(conn, field: str, key=None, contains=None, start_date=None, end_date=None):
+    """Distinct dates with at least one matching entry, oldest first, with their entry counts."""
+    where, params = _where(field, key, contains, start_date, end_date)
+    cursor = conn.cursor()
+    cursor.execute(
+        f"SELECT date, count(*) FROM json_entries WHERE {where} GROUP BY date ORDER BY date",
+        params
+    )
+    return [{"date": date, "entries": count} for date, count in cursor.fetchall()]
@@ -0,0 +1,224 @@
+"""Routine upkeep of the database file: planner statistics, WAL checkpoints, free pages.
+
+A maintenance run refreshes the query planner's statistics (ANALYZE with
+``analysis_limit``, then ``PRAGMA optimize``), hands free pages back to the
+file system with ``PRAGMA incremental_vacuum`` in VACUUM_PAGES_PER_STEP
+steps, and truncates the WAL with a checkpoint. Databases created before
+incremental auto-vacuum was enabled need one VACUUM rebuild to switch it
+on; it blocks writers for its whole duration, so it only runs when asked
+for (``run(rebuild=True)``, ``POST /api/admin/maintenance?rebuild=true``).
+Until then runs skip reclaiming pages and report ``rebuild_needed``.
+
+Every worker runs a scheduler thread (HEALTH_MAINTENANCE_INTERVAL_HOURS, 0 to
+disable) that waits for the database to be idle: no request to this worker
+and no change of data_version for HEALTH_MAINTENANCE_IDLE_SECONDS. The
+vacuum steps stop as soon as that is no longer true. app_meta records when
+the last scheduled run started, so one worker takes each run, and the last
+run's result for get_stats().
+"""
+from datetime import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from .database import db_manager
+
+MAINTENANCE_INTERVAL_ENV = "HEALTH_MAINTENANCE_INTERVAL_HOURS"
+MAINTENANCE_IDLE_ENV = "HEALTH_MAINTENANCE_IDLE_SECONDS"
+
+DEFAULT_INTERVAL_HOURS = 24
+DEFAULT_IDLE_SECONDS = 300
+
+# Rows sampled per index by ANALYZE; bounds its run time on large tables.
+ANALYSIS_LIMIT = 1000
+VACUUM_PAGES_PER_STEP = 256
+STEP_SLEEP_SECONDS = 0.01
+
+# How often scheduler threads check whether a run is due and the database idle.
+SCHEDULE_POLL_SECONDS = 60
+
+AUTO_VACUUM_MODES = {0: "none", 1: "full", 2: "incremental"}
+AUTO_VACUUM_INCREMENTAL = 2
+
+logger = logging.getLogger(__name__)
+
+
+def _pragma(conn, name: str):
+    return conn.execute(f"PRAGMA {name}").fetchone()[0]
+
+
+class Maintenance:
+    def __init__(self, db_manager, interval_hours: float = DEFAULT_INTERVAL_HOURS,
+                 idle_seconds: float = DEFAULT_IDLE_SECONDS):
+        self.db = db_manager
+        self.interval_hours = interval_hours
+        self.idle_seconds = idle_seconds
+        self._last_request = time.monotonic()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def touch(self):
+        """Note a request to this worker; scheduled runs wait until requests stop."""
+        self._last_request = time.monotonic()
+
+    def run(self, reason: str = "manual", is_idle=lambda: True, rebuild: bool = False) -> dict:
+        """Run all maintenance steps now; free pages are reclaimed while ``is_idle()`` holds.
+
+        ``rebuild`` allows the one-time VACUUM that enables incremental
+        auto-vacuum on older databases. Raises RuntimeError if this process
+        is already running maintenance.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("Maintenance is already running")
+        try:
+            result = self._run(reason, is_idle, rebuild)
+        finally:
+            self._lock.release()
+        logger.info("maintenance reason=%s seconds=%.3f free_pages=%d->%d rebuilt=%s", reason,
+                    result["duration_seconds"], result["free_pages_before"], result["free_pages_after"],
+                    result["rebuilt"])
+        return result
+
+    def _run(self, reason: str, is_idle, rebuild: bool) -> dict:
+        started_at = datetime.now().isoformat(timespec="seconds")
+        started = time.monotonic()
+        conn = self.db.get_connection()
+        try:
+            result = {"reason": reason, "started_at": started_at, "free_pages_before": _pragma(conn, "freelist_count")}
+            conn.execute(f"PRAGMA analysis_limit={ANALYSIS_LIMIT}")
+            conn.execute("ANALYZE")
+            conn.execute("PRAGMA optimize")
+            result["rebuilt"] = result["rebuild_needed"] = False
+            if self.db.db_path and _pragma(conn, "auto_vacuum") != AUTO_VACUUM_INCREMENTAL:
+                if rebuild:
+                    # Only takes effect through a full rebuild; afterwards incremental_vacuum keeps the file compact
+                    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    conn.execute("VACUUM")
+                    result["rebuilt"] = True
+                else:
+                    result["rebuild_needed"] = True
+            elif self.db.db_path:
+                while _pragma(conn, "freelist_count") and is_idle():
+                    # executescript steps the pragma to completion; execute() frees a single page
+                    conn.executescript(f"PRAGMA incremental_vacuum({VACUUM_PAGES_PER_STEP});")
+                    time.sleep(STEP_SLEEP_SECONDS)
+            result["free_pages_after"] = _pragma(conn, "freelist_count")
+            if self.db.db_path:
+                busy, wal_pages, checkpointed = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+                result["checkpoint"] = {"busy": bool(busy), "wal_pages": wal_pages, "checkpointed": checkpointed}
+            result["duration_seconds"] = round(time.monotonic() - started, 3)
+            conn.execute(
+                "INSERT OR REPLACE INTO app_meta (key, value) VALUES ('maintenance_last_run', ?)",
+                (json.dumps(result),)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return result
+
+    def get_stats(self) -> dict:
+        """Page and fragmentation statistics of the database file, and the last maintenance run.
+
+        Per table, ``out_of_order`` is the share of pages not directly
+        following the previous page of the same b-tree, so a scan of it seeks;
+        tables are empty where SQLite lacks the dbstat virtual table.
+        """
+        conn = self.db.get_connection()
+        try:
+            page_count = _pragma(conn, "page_count")
+            free_pages = _pragma(conn, "freelist_count")
+            stats = {
+                "page_size": _pragma(conn, "page_size"),
+                "page_count": page_count,
+                "free_pages": free_pages,
+                "free_ratio": round(free_pages / page_count, 4) if page_count else 0.0,
+                "auto_vacuum": AUTO_VACUUM_MODES.get(_pragma(conn, "auto_vacuum"), "unknown"),
+                "journal_mode": _pragma(conn, "journal_mode"),
+                "file_bytes": os.path.getsize(self.db.db_path) if self.db.db_path else None,
+                "wal_bytes": (
+                    os.path.getsize(f"{self.db.db_path}-wal")
+                    if self.db.db_path and os.path.exists(f"{self.db.db_path}-wal") else None
+                ),
+                "tables": self._table_stats(conn),
+            }
+            row = conn.execute("SELECT value FROM app_meta WHERE key = 'maintenance_last_run'").fetchone()
+        finally:
+            conn.close()
+        stats["last_run"] = json.loads(row[0]) if row else None
+        stats["interval_hours"] = self.interval_hours
+        stats["idle_seconds"] = self.idle_seconds
+        return stats
+
+    def _table_stats(self, conn) -> list[dict]:
+        try:
+            rows = conn.execute("SELECT name, pageno, pgsize, unused FROM dbstat WHERE schema = 'main'").fetchall()
+        except sqlite3.OperationalError:
+            return []
+        tables = {}
+        # dbstat lists each b-tree's pages in traversal order
+        for name, pageno, size, unused in rows:
+            table = tables.setdefault(name, {"name": name, "pages": 0, "bytes": 0, "unused_bytes": 0, "jumps": 0})
+            if table["pages"] and pageno != table["last"] + 1:
+                table["jumps"] += 1
+            table["last"] = pageno
+            table["pages"] += 1
+            table["bytes"] += size
+            table["unused_bytes"] += unused or 0
+        result = []
+        for table in sorted(tables.values(), key=lambda t: t["bytes"], reverse=True):
+            jumps = table.pop("jumps")
+            table.pop("last")
+            table["out_of_order"] = round(jumps / (table["pages"] - 1), 4) if table["pages"] > 1 else 0.0
+            result.append(table)
+        return result
+
+    def _schedule_loop(self):
+        version, changed = None, time.monotonic()
+
+        def is_idle():
+            quiet_since = max(changed, self._last_request)
+            return time.monotonic() - quiet_since >= self.idle_seconds and self.db.get_data_version() == version
+
+        while not self._stop.wait(SCHEDULE_POLL_SECONDS):
+            try:
+                current = self.db.get_data_version()
+                if current != version:
+                    version, changed = current, time.monotonic()
+                if is_idle() and self.db.claim_schedule("maintenance_scheduled_at", self.interval_hours):
+                    self.run("scheduled", is_idle)
+            except Exception:
+                logger.exception("Scheduled maintenance failed")
+
+    def start(self):
+        """Start the scheduler thread unless HEALTH_MAINTENANCE_INTERVAL_HOURS is 0."""
+        if not self.interval_hours or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._schedule_loop, name="maintenance-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+
+def create_maintenance(db_manager) -> Maintenance:
+    """Maintenance configured from the HEALTH_MAINTENANCE_* environment variables."""
+    return Maintenance(
+        db_manager,
+        interval_hours=float(os.environ.get(MAINTENANCE_INTERVAL_ENV, DEFAULT_INTERVAL_HOURS)),
+        idle_seconds=float(os.environ.get(MAINTENANCE_IDLE_ENV, DEFAULT_IDLE_SECONDS)),
+    )
+
+
+maintenance = create_maintenance(db_manager)
+
+
+def get_maintenance():
+    return maintenance
@@ -0,0 +1,25 @@
+"""Rewrite legacy plain-text notes/triggers/interventions and exercise logs into canonical JSON.
+
+Runs automatically once on startup; run it again manually after importing old
+data, e.g. from the backend directory:
+
+    python -m app.db.repair_json [--db health_records.db]
+"""
+import argparse
+import logging
+
+from .database import DB_PATH, DBManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DB_PATH, help="path to the SQLite database")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    rewritten = DBManager(args.db).repair_legacy_json()
+    print(f"Rewrote {rewritten} value(s) in {args.db}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""FTS5 full-text index over free-text record, summary and exercise fields.
+
+SQLite's bundled tokenizers either keep a run of CJK characters as one token
+(unicode61) or need queries of at least three characters (trigram), so
+neither finds "颈椎" inside "颈椎不适". Text is therefore indexed with every
+CJK character as its own token, and queries are issued as FTS5 phrases,
+which match consecutive tokens: a substring match for CJK text that is still
+ranked with bm25.
+
+search_index is a contentless FTS5 table, so the text is not stored twice:
+search_docs maps each rowid to its source row (record id, or date for
+summaries and exercise logs) and field, and snippets are cut from the source
+rows. The CRUD classes call unindex_* before changing a row and index_*
+after.
+"""
+import html
+import json
+import logging
+import re
+
+from . import text_codec
+
+RECORD_SEARCH_FIELDS = ("body_feeling_note",)
+
+SUMMARY_SEARCH_FIELDS = (
+    "sleep_note",
+    "daily_activity_note",
+    "pain_increasing_activities",
+    "pain_decreasing_activities",
+    "dizziness_increasing_activities",
+    "dizziness_decreasing_activities",
+    "medication_note",
+)
+
+# Characters of snippet context on each side of the first match.
+SNIPPET_CONTEXT = 20
+
+# Kana, CJK ideographs (incl. extension A and compatibility) and Hangul.
+_CJK = re.compile("([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uac00-\ud7af])")
+_WORD = re.compile(r"\w")
+
+logger = logging.getLogger(__name__)
+
+
+def create_table(cursor):
+    # Contentless: the index holds only the terms' postings, not a copy of the text
+    cursor.execute("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(terms, content = '', tokenize = 'unicode61')")
+    # What each indexed rowid is; AUTOINCREMENT so an id is never reused for a different text
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS search_docs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source TEXT NOT NULL,
+            ref NOT NULL,
+            date TEXT NOT NULL,
+            time_of_day TEXT,
+            field TEXT NOT NULL,
+            label TEXT
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_search_docs_source_ref ON search_docs (source, ref)")
+
+
+def to_terms(text: str) -> str:
+    """Split CJK characters into separate tokens for the unicode61 tokenizer.
+
+    Removing a document re-derives its terms with this function, so a change
+    to it needs the index rebuilt (drop search_docs and restart).
+    """
+    return _CJK.sub(r" \1 ", text)
+
+
+def build_match_query(query: str) -> str:
+    """Turn user input into an FTS5 query: one phrase per whitespace-separated word, ANDed."""
+    phrases = []
+    for word in query.split():
+        tokens = [t for t in to_terms(word).split() if _WORD.search(t)]
+        if tokens:
+            phrases.append('"' + " ".join(t.replace('"', '""') for t in tokens) + '"')
+    return " ".join(phrases)
+
+
+def _parse_log(data) -> dict:
+    try:
+        parsed = json.loads(data) if isinstance(data, str) else data
+    except ValueError:
+        return {}
+    return parsed if isinstance(parsed, dict) else {}
+
+
+def _docs(source: str, row: dict) -> list[tuple]:
+    """(field, label, text) of every indexed text of a record/summary row or exercise log, in index order."""
+    if source == "exercise":
+        items = [item for item in row.values() if isinstance(item, dict)]
+        docs = [("feedback", item.get("name"), item.get("feedback")) for item in items]
+    else:
+        fields = RECORD_SEARCH_FIELDS if source == "record" else SUMMARY_SEARCH_FIELDS
+        docs = [(field, None, row.get(field)) for field in fields]
+    return [doc for doc in docs if doc[2] and isinstance(doc[2], str)]
+
+
+def _stored_docs(cursor, source: str, ref, sources: dict = None) -> list[tuple]:
+    """_docs of the row currently stored for ``ref`` (record id, or date), read from ``sources``."""
+    if source == "record":
+        table, key, fields = "daily_records", "id", RECORD_SEARCH_FIELDS
+    elif source == "summary":
+        table, key, fields = "daily_summaries", "date", SUMMARY_SEARCH_FIELDS
+    else:
+        table, key, fields = "exercise_logs", "date", ("data",)
+    cursor.execute(
+        f"SELECT {', '.join(text_codec.sql(f) for f in fields)} FROM {(sources or {}).get(table, table)} "
+        f"WHERE {key} = ?",
+        (ref,)
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return []
+    return _docs(source, _parse_log(row[0]) if source == "exercise" else dict(zip(fields, row)))
+
+
+def _add(cursor, source: str, ref, date: str, time_of_day, row: dict):
+    for field, label, text in _docs(source, row):
+        cursor.execute(
+            "INSERT INTO search_docs (source, ref, date, time_of_day, field, label) VALUES (?, ?, ?, ?, ?, ?)",
+            (source, ref, date, time_of_day, field, label)
+        )
+        cursor.execute("INSERT INTO search_index (rowid, terms) VALUES (?, ?)", (cursor.lastrowid, to_terms(text)))
+
+
+def _remove(cursor, source: str, ref):
+    """Drop ``ref``'s documents; call before its stored row is changed or deleted.
+
+    A contentless index deletes a document given the terms it was indexed
+    with, re-derived here from the stored row. Should they not line up with
+    search_docs, only the mapping rows go: the orphaned postings never match
+    a search_docs id again, and the next rebuild drops them.
+    """
+    cursor.execute("SELECT id, field, label FROM search_docs WHERE source = ? AND ref = ? ORDER BY id", (source, ref))
+    ids = cursor.fetchall()
+    if not ids:
+        return
+    docs = _stored_docs(cursor, source, ref)
+    if [(field, label) for _, field, label in ids] == [(field, label) for field, label, _ in docs]:
+        for (doc_id, _, _), (_, _, text) in zip(ids, docs):
+            cursor.execute(
+                "INSERT INTO search_index (search_index, rowid, terms) VALUES ('delete', ?, ?)", (doc_id, to_terms(text))
+            )
+    else:
+        logger.warning("search_index stale documents source=%s ref=%s", source, ref)
+    cursor.execute("DELETE FROM search_docs WHERE source = ? AND ref = ?", (source, ref))
+
+
+def unindex_record(cursor, record_id: int):
+    _remove(cursor, "record", record_id)
+
+
+def index_record(cursor, record_id: int, date: str, time_of_day: str, record: dict):
+    _add(cursor, "record", record_id, date, time_of_day, record)
+
+
+def unindex_summary(cursor, date: str):
+    _remove(cursor, "summary", date)
+
+
+def index_summary(cursor, date: str, summary: dict):
+    _add(cursor, "summary", date, date, None, summary)
+
+
+def unindex_exercise_log(cursor, date: str):
+    _remove(cursor, "exercise", date)
+
+
+def index_exercise_log(cursor, date: str, data):
+    _add(cursor, "exercise", date, date, None, data if isinstance(data, dict) else {})
+
+
+def rebuild(conn, sources: dict = None):
+    """Re-index every row of ``sources`` (archive.sources(), to include archived years)."""
+    sources = sources or {}
+    cursor = conn.cursor()
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('delete-all')")
+    cursor.execute("DELETE FROM search_docs")
+
+    fields = ", ".join(text_codec.sql(field) for field in RECORD_SEARCH_FIELDS)
+    cursor.execute(
+        "SELECT id, date, CASE time_of_day WHEN '早起时' THEN '起床' WHEN '中午' THEN '下午' "
+        f"ELSE time_of_day END, {fields} FROM {sources.get('daily_records', 'daily_records')}"
+    )
+    for row in cursor.fetchall():
+        index_record(conn.cursor(), row[0], row[1], row[2], dict(zip(RECORD_SEARCH_FIELDS, row[3:])))
+
+    fields = ", ".join(text_codec.sql(field) for field in SUMMARY_SEARCH_FIELDS)
+    cursor.execute(f"SELECT date, {fields} FROM {sources.get('daily_summaries', 'daily_summaries')}")
+    for row in cursor.fetchall():
+        index_summary(conn.cursor(), row[0], dict(zip(SUMMARY_SEARCH_FIELDS, row[1:])))
+
+    cursor.execute(f"SELECT date, {text_codec.sql('data')} FROM {sources.get('exercise_logs', 'exercise_logs')}")
+    for date, data in cursor.fetchall():
+        index_exercise_log(conn.cursor(), date, _parse_log(data))
+
+
+def make_snippet(text: str, query: str) -> str:
+    """Cut a window around the first match and wrap matches in <mark> (HTML-escaped)."""
+    words = [w for w in query.split() if w]
+    if not words:
+        return html.escape(text[:2 * SNIPPET_CONTEXT])
+    pattern = re.compile("|".join(re.escape(w) for w in words), re.IGNORECASE)
+    first = pattern.search(text)
+    if not first:
+        return html.escape(text[:2 * SNIPPET_CONTEXT])
+
+    start = max(0, first.start() - SNIPPET_CONTEXT)
+    end = min(len(text), first.end() + SNIPPET_CONTEXT)
+    window = text[start:end]
+
+    parts = []
+    last = 0
+    for m in pattern.finditer(window):
+        parts.append(html.escape(window[last:m.start()]))
+        parts.append("<mark>" + html.escape(m.group(0)) + "</mark>")
+        last = m.end()
+    parts.append(html.escape(window[last:]))
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    return prefix + "".join(parts) + suffix
+
+
+def search(conn, query: str, limit: int, offset: int, sources_for=None):
+    """Return (total, hits) ranked by bm25, best first.
+
+    Snippets are cut from the stored rows; ``sources_for(start, end)`` gives
+    their FROM expressions (archive.sources) for the dates of the page.
+    """
+    match = build_match_query(query)
+    if not match:
+        return 0, []
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT count(*) FROM search_index JOIN search_docs d ON d.id = search_index.rowid WHERE search_index MATCH ?",
+        (match,)
+    )
+    total = cursor.fetchone()[0]
+    cursor.execute(
+        """
+        SELECT d.id, d.source, d.ref, d.date, d.time_of_day, d.field, d.label, bm25(search_index) AS score
+        FROM search_index
+        JOIN search_docs d ON d.id = search_index.rowid
+        WHERE search_index MATCH ?
+        ORDER BY score, d.date DESC
+        LIMIT ? OFFSET ?
+        """,
+        (match, limit, offset)
+    )
+    rows = cursor.fetchall()
+    if not rows:
+        return total, []
+    dates = [row[3] for row in rows]
+    sources = sources_for(min(dates), max(dates)) if sources_for else None
+    docs = {}
+    hits = []
+    for doc_id, source, ref, date, time_of_day, field, label, score in rows:
+        if (source, ref) not in docs:
+            cursor.execute("SELECT id FROM search_docs WHERE source = ? AND ref = ? ORDER BY id", (source, ref))
+            ids = [r[0] for r in cursor.fetchall()]
+            docs[source, ref] = dict(zip(ids, _stored_docs(cursor, source, ref, sources)))
+        text = docs[source, ref].get(doc_id, (None, None, ""))[2]
+        hits.append({
+            "source": source,
+            "date": date,
+            "time_of_day": time_of_day,
+            "field": field,
+            "label": label,
+            "snippet": make_snippet(text, query),
+            "score": -score,
+        })
+    return total, hits
@@ -0,0 +1,169 @@
+"""Symptom catalogue and long-format symptom_scores(symptom_id, date, slot, level).
+
+Built-in symptoms keep their wide columns on daily_records (per-slot) and
+daily_summaries (per-day), which the record API reads and writes unchanged;
+triggers mirror every write into symptom_scores. Custom symptoms added to the
+catalogue have no column and live in symptom_scores only. The primary key
+(symptom_id, date, slot) makes a per-symptom range read a single index scan.
+
+A write re-derives the scores of the (date, slot) cells it touches, so the
+mirror agrees with the record reads: a per-day level is the summary's value,
+else the day's highest legacy value on daily_records; a per-slot level comes
+from the slot's first record, with alias slots (早起时, 中午) folded into
+their canonical slot.
+"""
+
+# (id, wide column, scope, label) in display order; slot symptoms live on daily_records.
+BUILTIN_SYMPTOMS = (
+    ("pain", "pain_level", "slot", "肩颈/背/腰疼痛僵硬"),
+    ("dizziness", "dizziness_level", "slot", "头晕"),
+    ("mood", "mood_level", "slot", "情绪状态"),
+    ("stomach", "stomach_level", "day", "胃部不适/反流"),
+    ("throat", "throat_level", "day", "咽喉不适"),
+    ("dry_eye", "dry_eye_level", "day", "干眼症状"),
+    ("fatigue", "fatigue_level", "day", "疲劳/困倦"),
+)
+
+SYMPTOM_SCOPES = ("slot", "day")
+
+# Slot value stored for per-day symptoms.
+DAY_SLOT = ""
+
+
+def _slot_expr(ref: str) -> str:
+    return f"CASE {ref}.time_of_day WHEN '早起时' THEN '起床' WHEN '中午' THEN '下午' ELSE {ref}.time_of_day END"
+
+
+def create_tables(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symptom_catalogue (
+            id TEXT PRIMARY KEY,
+            label TEXT NOT NULL,
+            scope TEXT NOT NULL,
+            column_name TEXT,
+            sort_order INTEGER NOT NULL DEFAULT 99,
+            enabled INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    cursor.executemany(
+        """
+        INSERT OR IGNORE INTO symptom_catalogue (id, label, scope, column_name, sort_order)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(sid, label, scope, column, order) for order, (sid, column, scope, label) in enumerate(BUILTIN_SYMPTOMS)]
+    )
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS symptom_scores (
+            symptom_id TEXT NOT NULL,
+            date TEXT NOT NULL,
+            slot TEXT NOT NULL,
+            level INTEGER NOT NULL,
+            PRIMARY KEY (symptom_id, date, slot)
+        ) WITHOUT ROWID
+    ''')
+
+    slot_symptoms = [(sid, column) for sid, column, scope, _ in BUILTIN_SYMPTOMS if scope == "slot"]
+    day_symptoms = [(sid, column) for sid, column, scope, _ in BUILTIN_SYMPTOMS if scope == "day"]
+    refresh = {
+        "daily_records": lambda ref: _refresh_slot(slot_symptoms, ref) + _refresh_day(day_symptoms, ref),
+        "daily_summaries": lambda ref: _refresh_day(day_symptoms, ref),
+    }
+    for table, cells in refresh.items():
+        for event, refs in (("INSERT", ("NEW",)), ("UPDATE", ("OLD", "NEW")), ("DELETE", ("OLD",))):
+            body = "\n".join(statement for ref in refs for statement in cells(ref))
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS symptom_scores_{table}_{event.lower()}
+                AFTER {event} ON {table}
+                BEGIN
+                    {body}
+                END
+            ''')
+
+
+def drop_triggers(cursor):
+    """Drop the mirroring triggers so create_tables() installs the current ones."""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'symptom_scores_%'")
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"DROP TRIGGER {name}")
+
+
+def _ids(symptoms) -> str:
+    return ", ".join(f"'{sid}'" for sid, _ in symptoms)
+
+
+def _refresh_slot(symptoms, ref: str) -> list[str]:
+    """Trigger statements re-deriving the per-slot scores of ``ref``'s (date, canonical slot)."""
+    slot = _slot_expr(ref)
+    statements = [
+        f"DELETE FROM symptom_scores WHERE symptom_id IN ({_ids(symptoms)}) AND date = {ref}.date AND slot = {slot};"
+    ]
+    statements += [
+        f"INSERT OR REPLACE INTO symptom_scores (symptom_id, date, slot, level) "
+        f"SELECT '{sid}', r.date, {slot}, r.{column} FROM daily_records r "
+        f"WHERE r.date = {ref}.date AND {_slot_expr('r')} = {slot} AND r.{column} IS NOT NULL "
+        f"ORDER BY r.id LIMIT 1;"
+        for sid, column in symptoms
+    ]
+    return statements
+
+
+def _refresh_day(symptoms, ref: str) -> list[str]:
+    """Trigger statements re-deriving the per-day scores of ``ref``'s date."""
+    statements = [
+        f"DELETE FROM symptom_scores WHERE symptom_id IN ({_ids(symptoms)}) "
+        f"AND date = {ref}.date AND slot = '{DAY_SLOT}';"
+    ]
+    statements += [
+        f"INSERT OR REPLACE INTO symptom_scores (symptom_id, date, slot, level) "
+        f"SELECT '{sid}', {ref}.date, '{DAY_SLOT}', level FROM (SELECT COALESCE("
+        f"(SELECT s.{column} FROM daily_summaries s WHERE s.date = {ref}.date), "
+        f"(SELECT MAX(r.{column}) FROM daily_records r WHERE r.date = {ref}.date)"
+        f") AS level) WHERE level IS NOT NULL;"
+        for sid, column in symptoms
+    ]
+    return statements
+
+
+def rebuild(cursor):
+    """Re-derive the built-in symptoms' scores from the wide tables; custom scores are kept."""
+    cursor.execute(
+        "DELETE FROM symptom_scores WHERE symptom_id IN (SELECT id FROM symptom_catalogue WHERE column_name IS NOT NULL)"
+    )
+    insert_from(cursor)
+
+
+def insert_from(cursor, schema: str = "main", where: str = "1", params: tuple = ()):
+    """Add the built-in symptoms' scores of ``schema``'s wide tables (e.g. an attached archive).
+
+    ``where`` filters the source rows (alias ``src``) and is bound to ``params``.
+    """
+    for sid, column, scope, _ in BUILTIN_SYMPTOMS:
+        if scope == "slot":
+            # The last write of a cell wins, so the slot's first record is inserted last
+            cursor.execute(
+                f"""
+                INSERT OR REPLACE INTO symptom_scores (symptom_id, date, slot, level)
+                SELECT '{sid}', src.date, {_slot_expr('src')}, src.{column}
+                FROM {schema}.daily_records src
+                WHERE src.{column} IS NOT NULL AND src.time_of_day IS NOT NULL AND {where}
+                ORDER BY src.id DESC
+                """,
+                params
+            )
+            continue
+        cursor.execute(
+            f"""
+            INSERT OR REPLACE INTO symptom_scores (symptom_id, date, slot, level)
+            SELECT '{sid}', src.date, '{DAY_SLOT}', src.{column}
+            FROM {schema}.daily_summaries src
+            WHERE src.{column} IS NOT NULL AND {where}
+            UNION ALL
+            SELECT '{sid}', src.date, '{DAY_SLOT}', MAX(src.{column})
+            FROM {schema}.daily_records src
+            WHERE src.{column} IS NOT NULL AND {where} AND NOT EXISTS (
+                SELECT 1 FROM {schema}.daily_summaries s WHERE s.date = src.date AND s.{column} IS NOT NULL
+            )
+            GROUP BY src.date
+            """,
+            params * 2
+        )
@@ -0,0 +1,85 @@
+"""Optional zlib compression of long free-text columns at rest.
+
+With HEALTH_TEXT_COMPRESSION=zlib, values of COMPRESSED_TEXT_COLUMNS of at
+least HEALTH_TEXT_COMPRESSION_MIN_BYTES (UTF-8) are stored as BLOBs:
+``b"z" + dictionary version + raw deflate`` against a preset dictionary of
+the app's recurring vocabulary, which is what makes short notes compress at
+all. Every connection registers ``health_text(value)``; reads wrap these
+columns in it, so a value is only inflated when its column is projected.
+Plain TEXT passes through ``health_text`` unchanged, so compressed and
+uncompressed rows mix freely and turning compression off needs no migration.
+"""
+import os
+import zlib
+
+TEXT_COMPRESSION_ENV = "HEALTH_TEXT_COMPRESSION"
+TEXT_COMPRESSION_MIN_BYTES_ENV = "HEALTH_TEXT_COMPRESSION_MIN_BYTES"
+DEFAULT_MIN_BYTES = 128
+
+ACTIVITY_COLUMNS = (
+    "pain_increasing_activities",
+    "pain_decreasing_activities",
+    "dizziness_increasing_activities",
+    "dizziness_decreasing_activities",
+)
+
+# Free-text columns eligible for compression; daily_records keeps legacy copies of the activities.
+COMPRESSED_TEXT_COLUMNS = {
+    "daily_records": ("body_feeling_note", *ACTIVITY_COLUMNS),
+    "daily_summaries": ("sleep_note", "daily_activity_note", *ACTIVITY_COLUMNS, "medication_note"),
+    "exercise_logs": ("data",),
+}
+
+SQL_FUNCTION = "health_text"
+
+_MAGIC = b"z"
+
+# Preset dictionaries by version byte; never change a published entry, add a new version.
+# zlib favours matches near the end of the dictionary, so the commonest strings go last.
+_DICTIONARIES = {
+    1: (
+        "睡眠 入睡 早醒 多梦 失眠 午睡 熬夜 久坐 久站 低头 看手机 电脑 开车 通勤 散步 跑步 游泳 瑜伽 "
+        "拉伸 热敷 冷敷 按摩 理疗 针灸 休息 喝水 咖啡 吃药 布洛芬 胃药 眼药水 "
+        "头晕 头痛 恶心 反流 胃胀 咽喉 干眼 疲劳 困倦 焦虑 情绪 "
+        "肩颈 颈椎 腰背 腰部 背部 肩膀 僵硬 酸痛 疼痛 不适 "
+        "起床 上午 下午 晚上 今天 昨天 明显 有点 比较 稍微 一直 好转 加重 减轻 缓解 没有 感觉 "
+        '"status": "部分完成", "status": "未完成", "status": "完成", '
+        '"feedback": "", "name": "{"id": "'
+    ).encode("utf-8"),
+}
+_CURRENT_VERSION = max(_DICTIONARIES)
+
+
+def compression_min_bytes():
+    """Size threshold from the environment, or None when compression is off."""
+    name = os.environ.get(TEXT_COMPRESSION_ENV, "off").lower()
+    if name in ("", "off", "none"):
+        return None
+    if name != "zlib":
+        raise ValueError(f"{TEXT_COMPRESSION_ENV} must be off or zlib, got {name!r}")
+    return int(os.environ.get(TEXT_COMPRESSION_MIN_BYTES_ENV, DEFAULT_MIN_BYTES))
+
+
+def encode(text, min_bytes: int):
+    """The stored form of ``text``: a compressed BLOB, or ``text`` itself if short or incompressible."""
+    if not isinstance(text, str):
+        return text
+    raw = text.encode("utf-8")
+    if len(raw) < min_bytes:
+        return text
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=_DICTIONARIES[_CURRENT_VERSION])
+    packed = _MAGIC + bytes([_CURRENT_VERSION]) + compressor.compress(raw) + compressor.flush()
+    return packed if len(packed) < len(raw) else text
+
+
+def decode(value):
+    """Inverse of encode; anything that is not a compressed BLOB is returned unchanged."""
+    if not isinstance(value, bytes) or len(value) < 2 or value[:1] != _MAGIC or value[1] not in _DICTIONARIES:
+        return value
+    decompressor = zlib.decompressobj(-15, zdict=_DICTIONARIES[value[1]])
+    return (decompressor.decompress(value[2:]) + decompressor.flush()).decode("utf-8")
+
+
+def sql(expression: str) -> str:
+    """Wrap a column expression so compressed values are read as text."""
+    return f"{SQL_FUNCTION}({expression})"
@@ -1,11 +1,26 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .api import records, exercises, summaries
+from .api import records, exercises, summaries, days, search, analytics, export, symptoms, admin
+from .db.backups import backup_store
+from .db.maintenance import maintenance
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    backup_store.start()
+    maintenance.start()
+    yield
+    maintenance.stop()
+    backup_store.stop()
+
 
 app = FastAPI(
     title="Health Recorder API",
     description="API for Health Recorder Application",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS
@@ -26,10 +41,22 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def track_activity(request, call_next):
+    # Scheduled maintenance waits for a quiet period
+    maintenance.touch()
+    return await call_next(request)
+
 # Include Routers
 app.include_router(records.router, prefix="/api/records", tags=["Records"])
 app.include_router(summaries.router, prefix="/api/daily_summaries", tags=["Daily Summaries"])
 app.include_router(exercises.router, prefix="/api/exercises", tags=["Exercises"])
+app.include_router(days.router, prefix="/api/days", tags=["Days"])
+app.include_router(search.router, prefix="/api/search", tags=["Search"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(symptoms.router, prefix="/api/symptoms", tags=["Symptoms"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
 
 @app.get("/")
 def read_root():
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Literal, Optional, Any
 
 # --- Daily Records ---
 
@@ -87,9 +87,245 @@ class ExerciseLog(BaseModel):
     data: Dict[str, Any]
     created_at: Optional[str] = None
 
+class ExerciseStats(BaseModel):
+    id: str
+    name: str
+    current_streak: int = 0
+    longest_streak: int = 0
+    completion_7d: float = 0.0
+    completion_30d: float = 0.0
+    completion_90d: float = 0.0
+
 class SymptomTrendPoint(BaseModel):
     datetime: str
     date: str
     time_of_day: str
     score: int
     symptom_name: str
+
+# --- Day bundles ---
+
+class DayBundle(BaseModel):
+    date: str
+    records: Dict[str, DailyRecord] = {}  # keyed by time_of_day
+    summary: Optional[DailySummary] = None
+    exercise_log: Optional[Dict[str, Any]] = None
+
+# --- Search ---
+
+class SearchHit(BaseModel):
+    source: str  # record | summary | exercise
+    date: str
+    time_of_day: Optional[str] = None
+    field: str
+    label: Optional[str] = None  # exercise name for exercise feedback
+    snippet: str
+    score: float
+
+class SearchResults(BaseModel):
+    total: int
+    items: List[SearchHit]
+
+class JsonEntry(BaseModel):
+    date: str
+    source: str  # record | summary
+    time_of_day: str = ""
+    field: str  # notes | triggers | interventions
+    key: str
+    value: str
+
+class JsonEntryResults(BaseModel):
+    total: int
+    items: List[JsonEntry]
+
+class JsonEntryDay(BaseModel):
+    date: str
+    entries: int
+
+# --- Analytics ---
+
+class ActivityTermStat(BaseModel):
+    term: str
+    field: str  # increasing | decreasing
+    days: int
+    frequency: float
+    mean_with: Optional[float] = None
+    mean_without: Optional[float] = None
+    difference: Optional[float] = None
+    next_day_delta: Optional[float] = None
+
+class ActivityAttribution(BaseModel):
+    symptom: str
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    data_version: int
+    days: int
+    terms: List[ActivityTermStat]
+
+class ExerciseLagEffect(BaseModel):
+    lag: int
+    days: int
+    correlation: Optional[float] = None
+    mean_when_done: Optional[float] = None
+    mean_when_skipped: Optional[float] = None
+    effect: Optional[float] = None
+
+class ExerciseSymptomCorrelation(BaseModel):
+    id: str
+    name: str
+    days_logged: int
+    completion_rate: Optional[float] = None
+    lags: List[ExerciseLagEffect]
+
+class ExerciseCorrelation(BaseModel):
+    symptom: str
+    start_date: str
+    end_date: str
+    data_version: int
+    days: int
+    exercises: List[ExerciseSymptomCorrelation]
+
+class RollingPoint(BaseModel):
+    date: str
+    value: float
+    mean: float
+    std: float
+    z: Optional[float] = None
+    flare: bool = False
+
+class ChangePoint(BaseModel):
+    date: str
+    direction: str  # up | down
+    baseline: float
+
+class RollingStats(BaseModel):
+    symptom: str
+    window: int
+    data_version: int
+    points: List[RollingPoint]
+    change_points: List[ChangePoint]
+
+class Heatmap(BaseModel):
+    symptom: str
+    start_date: str
+    days: int
+    slots: List[str]
+    missing: int
+    data_version: int
+    levels: List[int]  # day-major: levels[day * len(slots) + slot]
+
+class MissingSlot(BaseModel):
+    date: str
+    time_of_day: str
+
+class PeriodCoverage(BaseModel):
+    period: str
+    days: int
+    expected_slots: int
+    recorded_slots: int
+    slot_coverage: float
+    days_with_summary: int
+    summary_coverage: float
+
+class Completeness(BaseModel):
+    start_date: str
+    end_date: str
+    period: str
+    data_version: int
+    missing_total: int
+    missing: List[MissingSlot]
+    periods: List[PeriodCoverage]
+
+# --- Symptoms ---
+
+class SymptomCatalogueItem(BaseModel):
+    id: str = Field(pattern=r"^[a-z][a-z0-9_]{0,31}$")
+    label: str
+    scope: Literal["slot", "day"]
+    order: int = 99
+    enabled: bool = True
+    builtin: bool = False
+
+class SymptomScore(BaseModel):
+    date: str
+    slot: str = ""  # a time-of-day slot for "slot" symptoms, empty for "day" symptoms
+    level: Optional[int] = None  # None removes the score
+
+# --- Admin ---
+
+class ArchiveYear(BaseModel):
+    year: int
+    bytes: int
+    daily_records: int
+    daily_summaries: int
+    exercise_logs: int
+
+class ArchiveStatus(BaseModel):
+    cutoff: Optional[str] = None  # first date kept in the hot database
+    years: List[ArchiveYear]
+
+class BackupFile(BaseModel):
+    name: str
+    bytes: int
+    archive_years: int = 0  # archive year files copied alongside
+    archive_bytes: int = 0
+    created_at: str
+
+class BackupRun(BaseModel):
+    state: str  # running, done or failed
+    reason: str  # manual or scheduled
+    name: str
+    started_at: str
+    finished_at: Optional[str] = None
+    pages_total: int
+    pages_done: int
+    restarts: int  # copies restarted by concurrent writes
+    single_step: bool  # finished in one step after too many restarts
+    archive_years: Optional[int] = None
+    archive_restarts: int = 0  # whole set copied again because the archive changed
+    bytes: Optional[int] = None
+    duration_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+class BackupStatus(BaseModel):
+    directory: Optional[str] = None  # None when backups are unavailable
+    interval_hours: float  # 0 when not scheduled
+    keep: int
+    last: Optional[BackupRun] = None  # the running backup, or the last one
+    backups: List[BackupFile]
+
+class TablePageStats(BaseModel):
+    name: str  # table or index
+    pages: int
+    bytes: int
+    unused_bytes: int  # free space inside its pages
+    out_of_order: float  # share of pages not following the previous one
+
+class MaintenanceCheckpoint(BaseModel):
+    busy: bool
+    wal_pages: int
+    checkpointed: int
+
+class MaintenanceRun(BaseModel):
+    reason: str  # manual or scheduled
+    started_at: str
+    duration_seconds: float
+    free_pages_before: int
+    free_pages_after: int
+    rebuilt: bool  # VACUUM switched the file to incremental auto-vacuum
+    rebuild_needed: bool = False  # no incremental auto-vacuum yet; run with rebuild=true to enable it
+    checkpoint: Optional[MaintenanceCheckpoint] = None
+
+class MaintenanceStats(BaseModel):
+    page_size: int
+    page_count: int
+    free_pages: int
+    free_ratio: float  # free pages / all pages
+    auto_vacuum: str
+    journal_mode: str
+    file_bytes: Optional[int] = None
+    wal_bytes: Optional[int] = None
+    tables: List[TablePageStats]
+    last_run: Optional[MaintenanceRun] = None
+    interval_hours: float  # 0 when not scheduled
+    idle_seconds: float
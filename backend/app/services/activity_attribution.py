@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from datetime import date as date_cls
+import re
+
+import numpy as np
+
+# Activities are written as free text lists: "久坐，低头看手机; 熬夜"
+_SEPARATORS = re.compile(r"[\s,，、;；。.!！?？/|\\]+")
+
+
+def tokenize_activities(text: str) -> list[str]:
+    if not text:
+        return []
+    terms = []
+    for term in _SEPARATORS.split(text.lower()):
+        term = term.strip()
+        if term and term not in terms:
+            terms.append(term)
+    return terms
+
+
+def build_inverted_index(texts: list[str]) -> dict[str, list[int]]:
+    """Map each activity term to the (sorted) indices of the days it appears on."""
+    index: dict[str, list[int]] = {}
+    for day, text in enumerate(texts):
+        for term in tokenize_activities(text):
+            index.setdefault(term, []).append(day)
+    return index
+
+
+def _next_day_deltas(dates: list[str], scores: np.ndarray) -> np.ndarray:
+    """score[d+1] - score[d] where day d+1 is the following calendar day, else NaN."""
+    ordinals = np.array([date_cls.fromisoformat(d).toordinal() for d in dates], dtype=np.int64)
+    deltas = np.full(len(dates), np.nan)
+    if len(dates) > 1:
+        consecutive = np.diff(ordinals) == 1
+        deltas[:-1] = np.where(consecutive, np.diff(scores), np.nan)
+    return deltas
+
+
+def _round(value) -> float | None:
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def attribute_activities(rows: list[tuple], min_days: int = 1) -> dict:
+    """Compare symptom scores on days each activity term was recorded vs. other days.
+
+    ``rows`` are (date, mean_level, increasing_text, decreasing_text) ordered
+    by date, as returned by AnalyticsCRUD.get_daily_symptom_activities.
+    """
+    dates = [r[0] for r in rows]
+    scores = np.array([r[1] for r in rows], dtype=float)
+    n_days = len(dates)
+    deltas = _next_day_deltas(dates, scores)
+    has_delta = ~np.isnan(deltas)
+    deltas_filled = np.nan_to_num(deltas)
+
+    terms = []
+    for field, column in (("increasing", 2), ("decreasing", 3)):
+        index = build_inverted_index([r[column] for r in rows])
+        names = [t for t, days in index.items() if len(days) >= min_days]
+        if not names:
+            continue
+
+        presence = np.zeros((len(names), n_days), dtype=float)
+        for i, name in enumerate(names):
+            presence[i, index[name]] = 1.0
+
+        count = presence.sum(axis=1)
+        other = n_days - count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_with = presence @ scores / count
+            mean_without = np.where(other > 0, (scores.sum() - presence @ scores) / other, np.nan)
+            delta_days = presence @ has_delta
+            next_day_delta = np.where(delta_days > 0, presence @ deltas_filled / delta_days, np.nan)
+
+        difference = mean_with - mean_without
+        for i, name in enumerate(names):
+            terms.append({
+                "term": name,
+                "field": field,
+                "days": int(count[i]),
+                "frequency": round(float(count[i]) / n_days, 3),
+                "mean_with": _round(mean_with[i]),
+                "mean_without": _round(mean_without[i]),
+                "difference": _round(difference[i]),
+                "next_day_delta": _round(next_day_delta[i]),
+            })
+
+    terms.sort(key=lambda t: (-t["days"], t["term"]))
+    return {"days": n_days, "terms": terms}
@@ -0,0 +1,251 @@
+import threading
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from ..db.crud import (
+    AnalyticsCRUD,
+    ExerciseCRUD,
+    SymptomCRUD,
+    DAILY_SYMPTOM_COLUMNS,
+    PERIOD_FORMATS,
+    SLOT_FIELD_DEFAULTS,
+    TIME_SLOTS,
+)
+from ..db.symptom_scores import BUILTIN_SYMPTOMS
+from .activity_attribution import attribute_activities
+from .columnar_snapshot import get_snapshot
+from .exercise_correlation import correlate_exercises, parse_lags
+from .symptom_rolling import rolling_analysis
+
+ACTIVITY_SYMPTOMS = ("pain", "dizziness")
+
+# Heatmap cell value for days/slots without an entry.
+HEATMAP_MISSING = -1
+
+# Longest heatmap range: ten years of dense cells.
+HEATMAP_MAX_DAYS = 3660
+
+# Longest completeness range (the calendar of every day/slot is generated in SQL).
+COMPLETENESS_MAX_DAYS = 3660
+
+# Wide column name -> symptom catalogue id
+_SYMPTOM_IDS = {column: sid for sid, column, _, _ in BUILTIN_SYMPTOMS}
+
+
+class VersionedCache:
+    """Keep results for the current data version only; any write invalidates everything."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+
+    def get_or_compute(self, version: int, key, compute):
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries = {}
+            if key in self._entries:
+                return self._entries[key]
+        value = compute()
+        with self._lock:
+            if version == self._version:
+                self._entries[key] = value
+        return value
+
+
+_cache = VersionedCache()
+
+
+def _parse_range(start_date: str, end_date: str, max_days: Optional[int] = None):
+    """Validate YYYY-MM-DD bounds and return them ordered, at most ``max_days`` days apart (inclusive)."""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError("Invalid date format, expected YYYY-MM-DD")
+    if end < start:
+        start, end = end, start
+    if max_days is not None and (end - start).days + 1 > max_days:
+        raise ValueError(f"The range may span at most {max_days} days")
+    return start, end
+
+
+def _parse_optional_range(start_date: Optional[str], end_date: Optional[str]):
+    """Like _parse_range, but either bound may be omitted."""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+        end = datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    except ValueError:
+        raise ValueError("Invalid date format, expected YYYY-MM-DD")
+    if start and end and end < start:
+        start, end = end, start
+    return start, end
+
+
+class AnalyticsService:
+    def __init__(self, crud: AnalyticsCRUD, exercise_crud: ExerciseCRUD):
+        self.crud = crud
+        self.exercise_crud = exercise_crud
+        self.symptom_crud = SymptomCRUD(crud.db)
+
+    def _cached(self, key, compute):
+        version = self.crud.db.get_data_version()
+        return version, _cache.get_or_compute(version, key, compute)
+
+    def activity_attribution(
+        self,
+        symptom: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        min_days: int = 1
+    ):
+        if symptom not in ACTIVITY_SYMPTOMS:
+            raise ValueError(f"symptom must be one of {', '.join(ACTIVITY_SYMPTOMS)}")
+        start, end = _parse_optional_range(start_date, end_date)
+        start_date = start.isoformat() if start else None
+        end_date = end.isoformat() if end else None
+
+        def compute():
+            rows = self.crud.get_daily_symptom_activities(symptom, start_date, end_date)
+            return attribute_activities(rows, min_days=min_days)
+
+        version, result = self._cached(("activities", symptom, start_date, end_date, min_days), compute)
+        return {
+            "symptom": symptom,
+            "start_date": start_date,
+            "end_date": end_date,
+            "data_version": version,
+            **result,
+        }
+
+    def exercise_correlation(self, symptom: str, start_date: str, end_date: str, lags: str = "0,1"):
+        if symptom not in DAILY_SYMPTOM_COLUMNS:
+            raise ValueError(f"symptom must be one of {', '.join(DAILY_SYMPTOM_COLUMNS)}")
+        start, end = _parse_range(start_date, end_date)
+        lag_values = parse_lags(lags)
+
+        def compute():
+            symptom_end = end + timedelta(days=max(lag_values))
+            days, levels = get_snapshot(self.crud).daily_levels(symptom, start, symptom_end)
+            logs = self.exercise_crud.get_exercise_logs_in_range(start.isoformat(), end.isoformat())
+            config = self.exercise_crud.get_exercise_config()
+            return correlate_exercises(
+                start.isoformat(), end.isoformat(), days, levels, logs, config, lag_values
+            )
+
+        key = ("exercise_correlation", symptom, start, end, tuple(lag_values))
+        version, result = self._cached(key, compute)
+        return {
+            "symptom": symptom,
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "data_version": version,
+            **result,
+        }
+
+    def rolling_stats(
+        self,
+        symptom: str,
+        window: int = 7,
+        flare_z: float = 2.0,
+        cusum_threshold: float = 4.0,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None
+    ):
+        if symptom not in DAILY_SYMPTOM_COLUMNS:
+            raise ValueError(f"symptom must be one of {', '.join(DAILY_SYMPTOM_COLUMNS)}")
+        start, end = _parse_optional_range(start_date, end_date)
+
+        def compute():
+            days, levels = get_snapshot(self.crud).daily_levels(symptom, start, end)
+            series = ((date.fromordinal(int(day)).isoformat(), float(level)) for day, level in zip(days, levels))
+            return rolling_analysis(series, window, flare_z, cusum_threshold)
+
+        key = ("rolling", symptom, window, flare_z, cusum_threshold, start_date, end_date)
+        version, result = self._cached(key, compute)
+        return {
+            "symptom": symptom,
+            "window": window,
+            "data_version": version,
+            **result,
+        }
+
+    def heatmap(self, symptom: str, start_date: str, end_date: str):
+        """One symptom's levels as a dense day-major (day, slot) grid.
+
+        ``symptom`` is a level column or a symptom catalogue id. Per-slot
+        symptoms use the four time-of-day slots; per-day symptoms have a
+        single slot. Missing cells are HEATMAP_MISSING.
+        """
+        entry = self.symptom_crud.get_symptom(_SYMPTOM_IDS.get(symptom, symptom))
+        if entry is None:
+            raise ValueError(f"Unknown symptom {symptom}")
+        start, end = _parse_range(start_date, end_date, HEATMAP_MAX_DAYS)
+
+        def compute():
+            days = (end - start).days + 1
+            first = start.toordinal()
+            slots = list(TIME_SLOTS) if entry["scope"] == "slot" else ["全天"]
+            grid = np.full((days, len(slots)), HEATMAP_MISSING, dtype=np.int16)
+            if symptom in SLOT_FIELD_DEFAULTS:
+                cell_days, cell_slots, levels = get_snapshot(self.crud).slot_levels(symptom, start, end)
+                grid[cell_days - first, cell_slots] = levels
+            else:
+                # Only this symptom's rows: a primary-key range scan of symptom_scores
+                slot_index = {slot: i for i, slot in enumerate(slots)} if entry["scope"] == "slot" else None
+                for cell_date, cell_slot, level in self.symptom_crud.get_scores(
+                    entry["id"], start.isoformat(), end.isoformat()
+                ):
+                    day = date.fromisoformat(cell_date).toordinal() - first
+                    slot = slot_index.get(cell_slot) if slot_index else 0
+                    if slot is not None and 0 <= day < days:
+                        grid[day, slot] = level
+            return {"days": days, "slots": slots, "levels": grid.ravel().tolist()}
+
+        version, result = self._cached(("heatmap", symptom, start, end), compute)
+        return {
+            "symptom": symptom,
+            "start_date": start.isoformat(),
+            "missing": HEATMAP_MISSING,
+            "data_version": version,
+            **result,
+        }
+
+    def completeness(self, start_date: str, end_date: str, period: str = "week", limit: int = 500, offset: int = 0):
+        """Missing (date, slot) pairs plus per-period slot and summary coverage."""
+        if period not in PERIOD_FORMATS:
+            raise ValueError(f"period must be one of {', '.join(PERIOD_FORMATS)}")
+        start, end = _parse_range(start_date, end_date, COMPLETENESS_MAX_DAYS)
+
+        def compute():
+            total, missing = self.crud.get_missing_slots(start.isoformat(), end.isoformat(), limit, offset)
+            periods = []
+            for key, days, recorded, summaries in self.crud.get_coverage(start.isoformat(), end.isoformat(), period):
+                expected = days * len(TIME_SLOTS)
+                periods.append({
+                    "period": key,
+                    "days": days,
+                    "expected_slots": expected,
+                    "recorded_slots": recorded,
+                    "slot_coverage": round(recorded / expected, 3),
+                    "days_with_summary": summaries,
+                    "summary_coverage": round(summaries / days, 3),
+                })
+            return {
+                "missing_total": total,
+                "missing": [{"date": d, "time_of_day": t} for d, t in missing],
+                "periods": periods,
+            }
+
+        key = ("completeness", start, end, period, limit, offset)
+        version, result = self._cached(key, compute)
+        return {
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+            "period": period,
+            "data_version": version,
+            **result,
+        }
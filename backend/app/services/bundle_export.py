@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from io import RawIOBase
+import time
+from typing import Callable, Iterable, Iterator
+import zipfile
+
+# (archive name, zero-argument callable returning the member's byte chunks)
+BundleMember = tuple[str, Callable[[], Iterable[bytes]]]
+
+
+class _ZipSink(RawIOBase):
+    """Write-only, unseekable target that hands back whatever zipfile wrote since the last drain.
+
+    Because it cannot seek, zipfile writes sizes and CRCs in data descriptors
+    after each member instead of patching local headers.
+    """
+
+    def __init__(self):
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(members: Iterable[BundleMember]) -> Iterator[bytes]:
+    """Stream a deflated ZIP archive, producing each member only when it is reached."""
+    sink = _ZipSink()
+    date_time = time.localtime()[:6]
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, produce in members:
+            info = zipfile.ZipInfo(name, date_time)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            with archive.open(info, "w") as member:
+                for chunk in produce():
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
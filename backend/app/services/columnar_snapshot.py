@@ -0,0 +1,219 @@
+"""Memory-mapped columnar snapshot of the record levels for vectorised analytics.
+
+daily_records ⟕ daily_summaries is materialised as one .npy file per column
+(date ordinal, slot index and the symptom levels), sorted by (date, slot) and
+record id, in ``<db path>.snapshot/<mark>/`` and opened with ``mmap_mode="r"``.
+Triggers mark every date a write touches in ``snapshot_dirty``; a refresh
+re-reads only those dates and merges them into the previous snapshot, so the
+cost of keeping it current follows the size of the change, not of the history.
+The database records the mark of the snapshot its dirty dates are relative to,
+so a directory left behind by another (or a restored) database is never used.
+A mark names the last dirty-date id it covers; once a snapshot is committed,
+directories covering no later ids can never be committed and are removed.
+Databases without a file (the memory backend) keep the snapshot in memory only.
+"""
+from __future__ import annotations
+
+from datetime import date as date_cls
+import os
+import shutil
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from ..db.crud import AnalyticsCRUD, SLOT_FIELD_DEFAULTS, SNAPSHOT_LEVEL_COLUMNS, TIME_SLOTS
+
+SNAPSHOT_DTYPES = {
+    "date": np.int32,
+    "slot": np.int8,
+    # Level integers are not bounded by the schema; values past int16 are clamped
+    **{col: np.int16 for col in SNAPSHOT_LEVEL_COLUMNS},
+}
+
+# Stored in place of NULL levels and unknown time-of-day slots.
+SNAPSHOT_NULL = -1
+
+# In-progress (.tmp) directories older than this were left by a crashed worker.
+STALE_TMP_SECONDS = 3600
+
+
+def _mark_last_id(mark: str) -> int:
+    """The last dirty-date id a mark ("v<version>-<last id>-<random>") covers; -1 for older names."""
+    parts = mark.split("-")
+    return int(parts[1]) if len(parts) == 3 and parts[1].isdigit() else -1
+
+
+class ColumnarSnapshot:
+    """Read-only column arrays for one data version, sorted by (date, slot, record id)."""
+
+    def __init__(self, version: int, mark: str, columns: dict[str, np.ndarray]):
+        self.version = version
+        self.mark = mark
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    def _range(self, start: date_cls | None, end: date_cls | None) -> slice:
+        dates = self.columns["date"]
+        lo = 0 if start is None else int(np.searchsorted(dates, start.toordinal(), "left"))
+        hi = len(dates) if end is None else int(np.searchsorted(dates, end.toordinal(), "right"))
+        return slice(lo, hi)
+
+    def slot_levels(self, symptom: str, start: date_cls, end: date_cls):
+        """(date ordinals, slot indices, levels) of non-NULL values in known slots, one per cell.
+
+        A slot with several records takes the first one's value, as symptom_scores does.
+        """
+        rows = self._range(start, end)
+        dates = self.columns["date"][rows]
+        slots = self.columns["slot"][rows]
+        levels = self.columns[symptom][rows]
+        keep = (levels != SNAPSHOT_NULL) & (slots != SNAPSHOT_NULL)
+        dates, slots, levels = dates[keep], slots[keep], levels[keep]
+        cells = dates.astype(np.int64) * len(TIME_SLOTS) + slots
+        _, first = np.unique(cells, return_index=True)
+        return dates[first], slots[first], levels[first]
+
+    def daily_levels(self, symptom: str, start: date_cls | None = None, end: date_cls | None = None):
+        """(date ordinals, levels) per day with records.
+
+        Per-slot symptoms are averaged over the day's records (NULL counts as
+        0); per-day symptoms take the day's value, or 0 when there is none.
+        """
+        rows = self._range(start, end)
+        dates = self.columns["date"][rows]
+        if not len(dates):
+            return np.zeros(0, dtype=np.int32), np.zeros(0)
+        levels = np.asarray(self.columns[symptom][rows], dtype=np.float64)
+        days, first = np.unique(dates, return_index=True)
+        if symptom in SLOT_FIELD_DEFAULTS:
+            counts = np.diff(np.append(first, len(dates)))
+            values = np.add.reduceat(np.maximum(levels, 0), first) / counts
+        else:
+            values = np.maximum(np.maximum.reduceat(levels, first), 0)
+        return days, values
+
+
+def _from_rows(rows: list[tuple]) -> dict[str, np.ndarray]:
+    table = np.array(rows, dtype=np.int64).reshape(len(rows), len(SNAPSHOT_DTYPES))
+    return {
+        name: np.clip(table[:, i], np.iinfo(dtype).min, np.iinfo(dtype).max).astype(dtype)
+        for i, (name, dtype) in enumerate(SNAPSHOT_DTYPES.items())
+    }
+
+
+class SnapshotStore:
+    """Keeps the snapshot of one database current; refreshes lazily when data_version moves."""
+
+    def __init__(self, crud: AnalyticsCRUD):
+        self.crud = crud
+        self.root = f"{crud.db.db_path}.snapshot" if crud.db.db_path else None
+        self._lock = threading.Lock()
+        self._current: ColumnarSnapshot | None = None
+
+    def get(self) -> ColumnarSnapshot:
+        version = self.crud.db.get_data_version()
+        current = self._current
+        if current is not None and current.version == version:
+            return current
+        with self._lock:
+            if self._current is None or self._current.version != version:
+                self._current = self._refresh(self._current)
+            return self._current
+
+    def _load(self, mark: str, version: int) -> ColumnarSnapshot | None:
+        if self.root is None:
+            current = self._current
+            return ColumnarSnapshot(version, mark, current.columns) if current and current.mark == mark else None
+        path = os.path.join(self.root, mark)
+        try:
+            columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in SNAPSHOT_DTYPES}
+        except (OSError, ValueError):
+            return None
+        if any(columns[name].dtype != dtype for name, dtype in SNAPSHOT_DTYPES.items()):
+            # Written with other column types (int8 levels before): rebuilt in full, and the
+            # directory removed so the rebuild is not refused as a duplicate of it
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        return ColumnarSnapshot(version, mark, columns)
+
+    def _write(self, version: int, last_id: int, columns: dict[str, np.ndarray]) -> ColumnarSnapshot:
+        mark = f"v{version}-{last_id}-{uuid.uuid4().hex[:8]}"
+        if self.root is None:
+            return ColumnarSnapshot(version, mark, columns)
+        tmp = os.path.join(self.root, f"{mark}.tmp")
+        os.makedirs(tmp)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), values)
+        os.replace(tmp, os.path.join(self.root, mark))
+        return self._load(mark, version)
+
+    def _exists(self, mark: str) -> bool:
+        return self.root is None or os.path.isdir(os.path.join(self.root, mark))
+
+    def _prune(self, committed: str):
+        """Remove snapshots the committed one supersedes; another worker's newer or in-progress ones stay."""
+        # Readers that still map an old directory keep their data until they drop it
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp"):
+                stale = time.time() - os.path.getmtime(path) > STALE_TMP_SECONDS
+            else:
+                stale = name != committed and _mark_last_id(name) <= _mark_last_id(committed)
+            if stale:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _refresh(self, base: ColumnarSnapshot | None) -> ColumnarSnapshot:
+        version, mark, last_id, dirty, rows = self.crud.read_snapshot_delta(full=False)
+        if base is None or base.mark != mark:
+            # Another worker materialised a newer snapshot, or this is the first read
+            base = self._load(mark, version) if mark else None
+
+        if base is None:
+            version, _, last_id, dirty, rows = self.crud.read_snapshot_delta(full=True)
+            fresh = _from_rows(rows)
+        elif not dirty:
+            return ColumnarSnapshot(version, base.mark, base.columns)
+        else:
+            dirty_days = np.array(
+                [date_cls.fromisoformat(d).toordinal() for d in dirty if _is_iso_date(d)], dtype=np.int32
+            )
+            keep = ~np.isin(base.columns["date"], dirty_days)
+            fresh = _from_rows(rows)
+            fresh = {name: np.concatenate([base.columns[name][keep], fresh[name]]) for name in SNAPSHOT_DTYPES}
+
+        # Stable, so each (date, slot) keeps the rows' id order
+        order = np.lexsort((fresh["slot"], fresh["date"]))
+        snapshot = self._write(version, last_id, {name: values[order] for name, values in fresh.items()})
+        if self.root is None:
+            self.crud.commit_snapshot(snapshot.mark, last_id)
+        elif self.crud.commit_snapshot(snapshot.mark, last_id, self._exists):
+            self._prune(snapshot.mark)
+        else:
+            # Superseded: the arrays stay valid for this refresh's readers, the directory goes
+            shutil.rmtree(os.path.join(self.root, snapshot.mark), ignore_errors=True)
+        return snapshot
+
+
+def _is_iso_date(value: str) -> bool:
+    try:
+        date_cls.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+_stores: dict = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot(crud: AnalyticsCRUD) -> ColumnarSnapshot:
+    """The up-to-date snapshot for crud's database (one store per DBManager)."""
+    with _stores_lock:
+        store = _stores.get(crud.db)
+        if store is None:
+            store = _stores[crud.db] = SnapshotStore(crud)
+    return store.get()
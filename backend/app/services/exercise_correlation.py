@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from datetime import date as date_cls
+
+import numpy as np
+
+from ..db.exercise_completions import EXERCISE_STATUS_SCORES
+
+MAX_LAG = 14
+
+
+def parse_lags(lags: str) -> list[int]:
+    """Parse "0,1,2" into sorted unique lags in [0, MAX_LAG]."""
+    values = sorted({int(part) for part in lags.split(",") if part.strip()})
+    if not values or values[0] < 0 or values[-1] > MAX_LAG:
+        raise ValueError(f"lags must be comma-separated integers between 0 and {MAX_LAG}")
+    return values
+
+
+def _round(value) -> float | None:
+    return None if np.isnan(value) else round(float(value), 3)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    counts = mask.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, np.where(mask, values, 0.0).sum(axis=1) / counts, np.nan)
+
+
+def correlate_exercises(
+    start_date: str,
+    end_date: str,
+    symptom_days: np.ndarray,
+    symptom_levels: np.ndarray,
+    logs: list[dict],
+    config: list[dict],
+    lags: list[int],
+) -> dict:
+    """Correlate per-exercise completion on day d with the symptom level on day d + lag.
+
+    ``symptom_days`` (date ordinals) and ``symptom_levels`` come from
+    ColumnarSnapshot.daily_levels and may extend past ``end_date`` by the
+    largest lag. Days without an exercise log count as unknown, not as skipped.
+    """
+    start = date_cls.fromisoformat(start_date).toordinal()
+    n_days = date_cls.fromisoformat(end_date).toordinal() - start + 1
+    horizon = n_days + max(lags)
+
+    levels = np.full(horizon, np.nan)
+    offsets = np.asarray(symptom_days, dtype=np.int64) - start
+    inside = (offsets >= 0) & (offsets < horizon)
+    levels[offsets[inside]] = np.asarray(symptom_levels)[inside]
+
+    # Exercise order follows the configuration; unknown ids from old logs go last.
+    exercises = {
+        item["id"]: item.get("name", "")
+        for item in sorted(config, key=lambda item: item.get("order", 999))
+        if isinstance(item, dict) and item.get("id")
+    }
+    logs = [log for log in logs if isinstance(log["data"], dict)]
+    for log in logs:
+        for eid, info in log["data"].items():
+            if eid not in exercises and isinstance(info, dict):
+                exercises[eid] = info.get("name", "")
+    ids = list(exercises)
+
+    completion = np.full((len(ids), n_days), np.nan)
+    for log in logs:
+        offset = date_cls.fromisoformat(log["date"]).toordinal() - start
+        if not 0 <= offset < n_days:
+            continue
+        completion[:, offset] = 0.0
+        for i, eid in enumerate(ids):
+            info = log["data"].get(eid)
+            if isinstance(info, dict):
+                completion[i, offset] = EXERCISE_STATUS_SCORES.get(info.get("status"), 0.0)
+
+    logged = ~np.isnan(completion)
+    days_logged = logged.sum(axis=1)
+    completion_rate = _masked_mean(completion, logged)
+
+    per_lag = []
+    for lag in lags:
+        shifted = np.broadcast_to(levels[lag:lag + n_days], completion.shape)
+        mask = logged & ~np.isnan(shifted)
+        n = mask.sum(axis=1)
+        x_mean = _masked_mean(completion, mask)
+        y_mean = _masked_mean(shifted, mask)
+        dx = np.where(mask, completion - x_mean[:, None], 0.0)
+        dy = np.where(mask, shifted - y_mean[:, None], 0.0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = (dx * dy).sum(axis=1) / np.sqrt((dx ** 2).sum(axis=1) * (dy ** 2).sum(axis=1))
+        done = _masked_mean(shifted, mask & (completion >= 1.0))
+        skipped = _masked_mean(shifted, mask & (completion == 0.0))
+        per_lag.append((lag, n, corr, done, skipped))
+
+    results = []
+    for i, eid in enumerate(ids):
+        results.append({
+            "id": eid,
+            "name": exercises[eid],
+            "days_logged": int(days_logged[i]),
+            "completion_rate": _round(completion_rate[i]),
+            "lags": [
+                {
+                    "lag": lag,
+                    "days": int(n[i]),
+                    "correlation": _round(corr[i]),
+                    "mean_when_done": _round(done[i]),
+                    "mean_when_skipped": _round(skipped[i]),
+                    "effect": _round(done[i] - skipped[i]),
+                }
+                for lag, n, corr, done, skipped in per_lag
+            ],
+        })
+    return {"days": n_days, "exercises": results}
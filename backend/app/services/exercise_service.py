@@ -69,23 +69,38 @@ class ExerciseService:
         self.crud.save_exercise_log(date_str, data)
         return data
 
-    def get_all_logs(self):
-        return self.crud.get_all_exercise_logs()
+    def get_all_logs(self, raw_json: bool = False):
+        return self.crud.get_all_exercise_logs(raw_json=raw_json)
+
+    def get_stats(self, as_of: str = None):
+        """Adherence stats for enabled exercises, in configured order."""
+        as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else datetime.now().date()
+        stats = self.crud.get_exercise_stats(as_of.isoformat())
+        config = sorted(
+            (item for item in self.get_config() if item.get('enabled', True)),
+            key=lambda item: item.get('order', 99)
+        )
+        empty = {
+            "current_streak": 0,
+            "longest_streak": 0,
+            "completion_7d": 0.0,
+            "completion_30d": 0.0,
+            "completion_90d": 0.0,
+        }
+        return [
+            {"id": item['id'], "name": item.get('name', ''), **stats.get(item['id'], empty)}
+            for item in config
+        ]
 
     def export_logs(self, start_date: str, end_date: str) -> str:
         """Generate markdown export for exercise logs within date range."""
-        all_logs = self.crud.get_all_exercise_logs()
         config = self.get_config()
         
-        # Parse dates
+        # Validate dates
         start = datetime.strptime(start_date, '%Y-%m-%d').date()
         end = datetime.strptime(end_date, '%Y-%m-%d').date()
         
-        # Filter logs
-        filtered_logs = [
-            l for l in all_logs 
-            if start <= datetime.strptime(l['date'], '%Y-%m-%d').date() <= end
-        ]
+        filtered_logs = self.crud.get_exercise_logs_in_range(start.isoformat(), end.isoformat())
         
         if not filtered_logs:
             return ""
@@ -37,8 +37,10 @@ def build_health_records_workbook(
     end_date: str,
     records: list[dict],
     summaries_by_date: dict[str, dict],
+    dates: list[str] | None = None,
 ) -> bytes:
-    dates = _date_range(start_date, end_date)
+    if dates is None:
+        dates = _date_range(start_date, end_date)
     time_slots = ["起床", "上午", "下午", "晚上"]
 
     records_by_date_time: dict[str, dict[str, dict]] = {}
@@ -1,12 +1,12 @@
-from ..db.crud import RecordCRUD
+from ..db.crud import RecordCRUD, RECORD_COLUMNS
 from ..schemas.schemas import DailyRecordCreate
 
 class RecordService:
     def __init__(self, crud: RecordCRUD):
         self.crud = crud
 
-    def get_record(self, date: str, time_of_day: str):
-        return self.crud.get_record(date, time_of_day)
+    def get_record(self, date: str, time_of_day: str, fields=RECORD_COLUMNS, raw_json: bool = False):
+        return self.crud.get_record(date, time_of_day, fields, raw_json)
 
     def create_or_update_record(self, record_data: DailyRecordCreate):
         # Convert Pydantic model to dict
@@ -14,11 +14,11 @@ class RecordService:
         self.crud.add_record(data)
         return self.get_record(data['date'], data['time_of_day'])
 
-    def get_all_records(self):
-        return self.crud.get_all_records()
+    def get_all_records(self, raw_json: bool = False, fields=RECORD_COLUMNS):
+        return self.crud.get_all_records(raw_json=raw_json, fields=fields)
 
-    def get_records_in_range(self, start_date: str, end_date: str):
-        return self.crud.get_records_in_range(start_date, end_date)
+    def get_records_in_range(self, start_date: str, end_date: str, raw_json: bool = False, fields=RECORD_COLUMNS):
+        return self.crud.get_records_in_range(start_date, end_date, raw_json=raw_json, fields=fields)
 
     def delete_record(self, record_id: int):
         self.crud.delete_record(record_id)
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import csv
+from io import StringIO
+from typing import Iterable, Iterator
+
+# Rows per yielded chunk; keeps chunks around tens of KB for typical records.
+EXPORT_BATCH_ROWS = 500
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return value
+
+
+def iter_csv(records: Iterable[dict], fields: tuple, batch_size: int = EXPORT_BATCH_ROWS) -> Iterator[bytes]:
+    """Encode records as CSV with a header row, yielding one chunk per ``batch_size`` rows.
+
+    JSON columns are expected as raw JSON text. The output starts with a UTF-8
+    BOM so spreadsheet applications detect the encoding of Chinese text.
+    """
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(fields)
+    pending = 0
+    for record in records:
+        writer.writerow([_csv_value(record[field]) for field in fields])
+        pending += 1
+        if pending >= batch_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue().encode("utf-8")
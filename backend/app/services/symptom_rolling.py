@@ -0,0 +1,127 @@
+"""Single-pass rolling statistics and change-point detection over a symptom series.
+
+Everything here consumes an iterator of (date, value) oldest first. Windows
+span calendar days, not rows: days without data leave a gap instead of
+stretching the window further back. Only the window's values are kept while
+scanning, so the working memory is O(window) regardless of history length.
+"""
+from __future__ import annotations
+
+from collections import deque
+from datetime import date as date_cls
+import math
+
+# Floor for the rolling standard deviation so flat series don't explode z-scores.
+MIN_STD = 0.5
+
+# CUSUM slack: drifts smaller than this many standard deviations are ignored.
+CUSUM_SLACK = 0.5
+
+# Values a trailing window needs before points are scored against it.
+MIN_WINDOW_VALUES = 2
+
+
+class RollingWindow:
+    """Running sums over the (day ordinal, value) pairs of a span of calendar days."""
+
+    __slots__ = ("values", "total", "total_sq")
+
+    def __init__(self):
+        self.values = deque()
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def push(self, day: int, value: float):
+        self.values.append((day, value))
+        self.total += value
+        self.total_sq += value * value
+
+    def evict_before(self, day: int):
+        """Drop values dated before ``day``."""
+        while self.values and self.values[0][0] < day:
+            _, old = self.values.popleft()
+            self.total -= old
+            self.total_sq -= old * old
+
+    @property
+    def mean(self) -> float:
+        return self.total / len(self.values)
+
+    @property
+    def std(self) -> float:
+        n = len(self.values)
+        if n < 2:
+            return 0.0
+        variance = (self.total_sq - self.total * self.total / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class CusumDetector:
+    """Two-sided CUSUM on z-scores against the trailing window's mean and std."""
+
+    __slots__ = ("threshold", "upper", "lower")
+
+    def __init__(self, threshold: float):
+        self.threshold = threshold
+        self.upper = 0.0
+        self.lower = 0.0
+
+    def update(self, z: float) -> str | None:
+        self.upper = max(0.0, self.upper + z - CUSUM_SLACK)
+        self.lower = max(0.0, self.lower - z - CUSUM_SLACK)
+        if self.upper > self.threshold:
+            self.upper = self.lower = 0.0
+            return "up"
+        if self.lower > self.threshold:
+            self.upper = self.lower = 0.0
+            return "down"
+        return None
+
+
+def rolling_analysis(series, window: int, flare_z: float, cusum_threshold: float) -> dict:
+    """Compute rolling mean/std, flare-up flags and change points in one pass.
+
+    ``series`` yields (date, value) oldest first. Each point is compared with
+    the ``window`` calendar days *before* it, once the series covers that
+    span and it holds MIN_WINDOW_VALUES values: a flare-up is a z-score of at
+    least ``flare_z``. A point's mean/std cover the ``window`` days ending on it.
+    """
+    trailing = RollingWindow()
+    detector = CusumDetector(cusum_threshold)
+    first_day = None
+    points = []
+    change_points = []
+
+    for date, value in series:
+        if value is None:
+            continue
+        value = float(value)
+        day = date_cls.fromisoformat(date).toordinal()
+        if first_day is None:
+            first_day = day
+        trailing.evict_before(day - window)
+        z = None
+        flare = False
+        if day - first_day >= window and len(trailing) >= MIN_WINDOW_VALUES:
+            baseline = trailing.mean
+            z = (value - baseline) / max(trailing.std, MIN_STD)
+            flare = z >= flare_z
+            direction = detector.update(z)
+            if direction:
+                change_points.append({"date": date, "direction": direction, "baseline": round(baseline, 3)})
+
+        trailing.push(day, value)
+        trailing.evict_before(day - window + 1)
+        points.append({
+            "date": date,
+            "value": round(value, 3),
+            "mean": round(trailing.mean, 3),
+            "std": round(trailing.std, 3),
+            "z": round(z, 3) if z is not None else None,
+            "flare": flare,
+        })
+
+    return {"points": points, "change_points": change_points}
@@ -0,0 +1,97 @@
+"""Per-record cost of the record list response paths.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization [--rows 5000] [--repeat 5]
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from app.api.responses import encode_rows, trusted_response
+from app.db.database import JSON_COLUMNS
+from app.schemas.schemas import DailyRecord
+
+
+def make_rows(count: int) -> list[dict]:
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": i,
+            "date": f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            "time_of_day": "上午",
+            "pain_level": i % 10,
+            "dizziness_level": i % 7,
+            "stomach_level": 1,
+            "throat_level": 2,
+            "dry_eye_level": 3,
+            "fatigue_level": 4,
+            "mood_level": 5,
+            "body_feeling_note": "肩颈僵硬，下午有所缓解",
+            "sleep_note": "前夜熬夜，睡眠约六小时",
+            "daily_activity_note": "散步半小时",
+            "pain_increasing_activities": "久坐，低头看手机",
+            "pain_decreasing_activities": "热敷",
+            "dizziness_increasing_activities": "",
+            "dizziness_decreasing_activities": "",
+            "medication_used": bool(i % 2),
+            "medication_note": "",
+            "notes": {"General": "整体还可以", "pain": "左侧更明显"},
+            "triggers": {"pain": "久坐"},
+            "interventions": {"pain": "拉伸"},
+            "created_at": "2024-01-01 08:00:00",
+        })
+    return rows
+
+
+def fastapi_default(rows):
+    """What response_model=List[DailyRecord] does: validate, dump, json.dumps."""
+    adapter = TypeAdapter(List[DailyRecord])
+    data = adapter.dump_python(adapter.validate_python(rows), mode="json")
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def trusted(rows):
+    return trusted_response(DailyRecord, rows).body
+
+
+def raw_splice(rows):
+    return encode_rows(rows, JSON_COLUMNS["daily_records"])
+
+
+def bench(fn, rows, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(rows)
+        best = min(best, time.perf_counter() - start)
+    return best / len(rows) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    raw_rows = [
+        {k: json.dumps(v, ensure_ascii=False) if k in JSON_COLUMNS["daily_records"] else v for k, v in row.items()}
+        for row in rows
+    ]
+
+    results = [
+        ("validate + json.dumps (response_model)", bench(fastapi_default, rows, args.repeat)),
+        ("model_construct + TypeAdapter.dump_json", bench(trusted, rows, args.repeat)),
+        ("orjson + raw JSON columns", bench(raw_splice, raw_rows, args.repeat)),
+    ]
+    print(f"{args.rows} records, best of {args.repeat}")
+    for name, per_record in results:
+        print(f"  {name:<42} {per_record:8.2f} us/record")
+
+
+if __name__ == "__main__":
+    main()
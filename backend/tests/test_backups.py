@@ -0,0 +1,110 @@
+import os
+import sqlite3
+
+# The app modules create their default DBManager on import; keep it off disk
+os.environ.setdefault("HEALTH_DB_BACKEND", "memory")
+
+import pytest
+
+from app.db import backups, search_index
+from app.db.backups import BackupStore
+from app.db.crud import RecordCRUD, SymptomCRUD
+from app.db.database import DBManager
+
+# daily_records, daily_summaries and exercise_logs as created before the backlog's schema changes
+LEGACY_SCHEMA = """
+CREATE TABLE daily_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    time_of_day TEXT NOT NULL,
+    pain_level INTEGER, dizziness_level INTEGER, stomach_level INTEGER, throat_level INTEGER,
+    dry_eye_level INTEGER, fatigue_level INTEGER, mood_level INTEGER DEFAULT 0,
+    body_feeling_note TEXT DEFAULT '', sleep_note TEXT DEFAULT '', daily_activity_note TEXT DEFAULT '',
+    pain_increasing_activities TEXT DEFAULT '', pain_decreasing_activities TEXT DEFAULT '',
+    dizziness_increasing_activities TEXT DEFAULT '', dizziness_decreasing_activities TEXT DEFAULT '',
+    medication_used INTEGER DEFAULT 0, medication_note TEXT DEFAULT '',
+    notes TEXT, triggers TEXT, interventions TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE daily_summaries (
+    date TEXT PRIMARY KEY,
+    stomach_level INTEGER, throat_level INTEGER, dry_eye_level INTEGER, fatigue_level INTEGER,
+    sleep_note TEXT, daily_activity_note TEXT,
+    pain_increasing_activities TEXT, pain_decreasing_activities TEXT,
+    dizziness_increasing_activities TEXT, dizziness_decreasing_activities TEXT,
+    medication_used INTEGER, medication_note TEXT,
+    notes TEXT, triggers TEXT, interventions TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE exercise_config (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE exercise_logs (date TEXT PRIMARY KEY, data TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+INSERT INTO daily_records (date, time_of_day, pain_level, stomach_level, body_feeling_note, notes)
+VALUES ('2019-03-01', '早起时', 4, 2, '肩颈僵硬', '[not json]');
+INSERT INTO daily_summaries (date, fatigue_level, sleep_note) VALUES ('2019-03-01', 3, '早醒');
+INSERT INTO exercise_logs (date, data) VALUES ('2019-03-01', '{"e1": {"status": "完成"}}');
+"""
+
+
+@pytest.fixture
+def live(tmp_path):
+    db = DBManager(str(tmp_path / "live.db"))
+    RecordCRUD(db).add_record({"date": "2024-01-01", "time_of_day": "上午", "pain_level": 1})
+    RecordCRUD(db).add_record({"date": "2018-01-01", "time_of_day": "上午", "pain_level": 2})
+    db.archive.archive_before("2020-01-01")
+    return db
+
+
+def _legacy_backup(path) -> str:
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+    return str(path)
+
+
+def test_restore_older_schema_backup(live, tmp_path):
+    previous = live.get_data_version()
+    result = BackupStore(live, directory=str(tmp_path / "backups")).restore(_legacy_backup(tmp_path / "old.db"))
+    assert result["archive_years"] == 0
+
+    records = RecordCRUD(live)
+    assert [(r["date"], r["time_of_day"], r["pain_level"]) for r in records.get_all_records()] == [
+        ("2019-03-01", "起床", 4)
+    ]
+    assert live.get_data_version() > previous
+    assert live.archive.get_years() == [] and live.archive.get_cutoff(live.get_connection()) is None
+    # Derived tables were built for the restored rows
+    assert SymptomCRUD(live).get_scores("stomach", "2019-03-01", "2019-03-01") == [("2019-03-01", "", 2)]
+    conn = live.get_connection()
+    assert search_index.search(conn, "肩颈", 10, 0)[0] == 1
+    conn.close()
+    # Writes go through the current triggers, and the file opens like any other database
+    records.add_record({"date": "2019-03-02", "time_of_day": "上午", "pain_level": 5})
+    reopened = RecordCRUD(DBManager(live.db_path))
+    assert len(reopened.get_all_records()) == 2
+    assert not os.path.exists(f"{live.db_path}.restore")
+
+
+def test_restore_replaces_archive_years(live, tmp_path):
+    store = BackupStore(live, directory=str(tmp_path / "backups"))
+    name = store.run()["name"]
+    records = RecordCRUD(live)
+    records.add_record({"date": "2021-06-01", "time_of_day": "上午", "pain_level": 3})
+    live.archive.archive_before("2022-01-01")
+    assert live.archive.get_years() == [2018, 2021]
+
+    store.restore(name)
+    assert live.archive.get_years() == [2018]
+    assert sorted(r["date"] for r in records.get_all_records()) == ["2018-01-01", "2024-01-01"]
+
+
+def test_failed_restore_leaves_live_untouched(live, tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(backups, "DBManager", fail)
+    with pytest.raises(sqlite3.OperationalError):
+        BackupStore(live, directory=str(tmp_path / "backups")).restore(_legacy_backup(tmp_path / "old.db"))
+
+    assert sorted(r["date"] for r in RecordCRUD(live).get_all_records()) == ["2018-01-01", "2024-01-01"]
+    assert live.archive.get_years() == [2018]
+    assert not os.path.exists(f"{live.db_path}.restore")
@@ -34,13 +34,10 @@ const DailyRecord = () => {
         setLoading(true);
         try {
             const dateStr = date.format('YYYY-MM-DD');
-            const [recordRes, summaryRes] = await Promise.all([
-                api.get(`/records/${dateStr}/${timeOfDay}`),
-                api.get(`/daily_summaries/${dateStr}`).catch(() => ({ data: null }))
-            ]);
+            const { data: day } = await api.get(`/days/${dateStr}`);
 
-            const recordData = recordRes.data || null;
-            const summaryData = summaryRes.data || null;
+            const recordData = day?.records?.[timeOfDay] || null;
+            const summaryData = day?.summary || null;
 
             if (!recordData && !summaryData) {
                 form.resetFields();
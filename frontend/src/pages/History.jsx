@@ -8,17 +8,19 @@ import dayjs from 'dayjs';
 const { Title } = Typography;
 const { RangePicker } = DatePicker;
 
+const TABLE_FIELDS = [
+    'pain_level', 'dizziness_level', 'mood_level', 'body_feeling_note', 'sleep_note',
+    'daily_activity_note', 'pain_increasing_activities', 'pain_decreasing_activities',
+    'dizziness_increasing_activities', 'dizziness_decreasing_activities',
+    'medication_used', 'medication_note'
+].join(',');
+
 const History = () => {
     const [data, setData] = useState([]);
     const [loading, setLoading] = useState(false);
     const [dateRange, setDateRange] = useState([dayjs().subtract(7, 'day'), dayjs()]);
     const dispatch = useDispatch();
 
-    const safeText = (value) => {
-        if (value === null || value === undefined) return '';
-        return String(value).replace(/"/g, '""').replace(/\r?\n/g, ' ');
-    };
-
     const normalizeTimeOfDay = (v) => {
         if (v === '早起时') return '起床';
         if (v === '中午') return '下午';
@@ -28,7 +30,8 @@ const History = () => {
     const fetchData = async () => {
         setLoading(true);
         try {
-            const res = await api.get('/records');
+            // The table shows no JSON columns, so skip them
+            const res = await api.get('/records', { params: { fields: TABLE_FIELDS } });
             setData(res.data);
         } catch {
             message.error('加载失败');
@@ -87,56 +90,30 @@ const History = () => {
         )}
     ], []);
 
-    const handleExport = () => {
-        const headers = [
-            'ID',
-            'Date',
-            'Time',
-            'Pain(0-10)',
-            'Dizziness(0-10)',
-            'Mood(0-10)',
-            'BodyFeeling',
-            'SleepLastNight',
-            'DailyActivity',
-            'PainIncreasingActivities',
-            'PainDecreasingActivities',
-            'DizzinessIncreasingActivities',
-            'DizzinessDecreasingActivities',
-            'MedicationUsed',
-            'MedicationNote'
-        ];
-
-        const rows = data.map((row) => {
-            const bodyFeeling = row.body_feeling_note || '';
-            const values = [
-                row.id,
-                row.date,
-                row.time_of_day,
-                row.pain_level ?? 0,
-                row.dizziness_level ?? 0,
-                row.mood_level ?? 0,
-                bodyFeeling,
-                row.sleep_note || '',
-                row.daily_activity_note || '',
-                row.pain_increasing_activities || '',
-                row.pain_decreasing_activities || '',
-                row.dizziness_increasing_activities || '',
-                row.dizziness_decreasing_activities || '',
-                row.medication_used ? 'true' : 'false',
-                row.medication_note || ''
-            ];
-
-            return values.map((v) => `"${safeText(v)}"`).join(',');
-        });
+    const handleExport = async () => {
+        const start = dateRange?.[0]?.format?.('YYYY-MM-DD');
+        const end = dateRange?.[1]?.format?.('YYYY-MM-DD');
+        if (!start || !end) {
+            message.error('请选择日期范围');
+            return;
+        }
 
-        const csvContent = `data:text/csv;charset=utf-8,${headers.join(',')}\n${rows.join('\n')}`;
-        
-        const encodedUri = encodeURI(csvContent);
-        const link = document.createElement("a");
-        link.setAttribute("href", encodedUri);
-        link.setAttribute("download", "health_records.csv");
-        document.body.appendChild(link);
-        link.click();
+        try {
+            const res = await api.get('/records/export', {
+                params: { format: 'csv', start_date: start, end_date: end, fields: TABLE_FIELDS },
+                responseType: 'blob'
+            });
+            const url = window.URL.createObjectURL(res.data);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = `health_records_${start.replaceAll('-', '')}_${end.replaceAll('-', '')}.csv`;
+            document.body.appendChild(link);
+            link.click();
+            link.remove();
+            window.URL.revokeObjectURL(url);
+        } catch (e) {
+            message.error('导出失败');
+        }
     };
 
     const handleExportExcel = async () => {
@@ -174,6 +151,7 @@ const History = () => {
                     <RangePicker value={dateRange} onChange={setDateRange} />
                     <Button onClick={handleExportExcel}>📤 导出 Excel</Button>
                     <Button onClick={handleExport}>📥 导出 CSV</Button>
+                    <Button href={`${api.defaults.baseURL}/export/bundle`}>📦 导出全部</Button>
                 </div>
             </div>
             <Table 
@@ -12,6 +12,8 @@ const EXTRA_METRICS = [
     { key: "mood_level", label: "😊 情绪状态", color: "#2f54eb" }
 ];
 
+const METRIC_FIELDS = [...SYMPTOMS_CONFIG, ...EXTRA_METRICS].map(s => s.key).join(',');
+
 const Trends = () => {
     const [data, setData] = useState([]);
     const [dateRange, setDateRange] = useState([dayjs().subtract(1, 'month'), dayjs()]);
@@ -20,12 +22,15 @@ const Trends = () => {
     useEffect(() => {
         const fetchData = async () => {
             try {
-                const res = await api.get('/records');
-                // Filter by date
-                let filtered = res.data.filter(r => {
-                    const d = dayjs(r.date);
-                    return d.isAfter(dateRange[0]) && d.isBefore(dateRange[1].add(1, 'day'));
+                // Only the level columns are needed for the chart
+                const res = await api.get('/records/range', {
+                    params: {
+                        start_date: dateRange[0].format('YYYY-MM-DD'),
+                        end_date: dateRange[1].format('YYYY-MM-DD'),
+                        fields: METRIC_FIELDS
+                    }
                 });
+                let filtered = res.data;
                 
                 // Sort by date and time
                 const timeMap = {